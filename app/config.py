@@ -4,7 +4,15 @@ import os
 PINECONE_KEY = os.getenv("PINECONE_KEY")
 GEMINI_KEY = os.getenv("GEMINI_KEY")
 
+# --- LOGGING ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
 # --- PATHS ---
 # Assumes this config.py is inside app/, so we go up one level to root
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "movies.db")
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", os.path.join(BASE_DIR, "rec_cache.db"))
+
+# --- DATABASE POOL ---
+# Mirrors the default ThreadPoolExecutor sizing (cpu + 4), capped at 32.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", min(32, (os.cpu_count() or 1) + 4)))
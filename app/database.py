@@ -1,52 +1,143 @@
-import sqlite3
 import os
-from contextlib import contextmanager
-from typing import List
-from app.config import DB_PATH
+import time
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Optional, Tuple
 
-@contextmanager
-def get_db_connection():
+import aiosqlite
+import orjson
+from aiosqlitepool import SQLiteConnectionPool
+
+from app.config import DB_PATH, DB_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+# The API only reads the catalog, so connections are opened read-only: a root-owned
+# or read-only movies.db (e.g. the Docker image running as appuser) works as is.
+# Nothing here may write to the file, which is why journal_mode is not touched.
+READONLY_DB_URI = f"{Path(DB_PATH).resolve().as_uri()}?mode=ro"
+
+# Applied once per pooled connection; long-lived connections keep the page cache hot.
+CONNECTION_PRAGMAS = (
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
+async def _connection_factory() -> aiosqlite.Connection:
+    # Rows stay plain tuples: readers select explicit columns and unpack by position
+    conn = await aiosqlite.connect(READONLY_DB_URI, uri=True)
+    for pragma in CONNECTION_PRAGMAS:
+        await conn.execute(pragma)
+    return conn
+
+pool = SQLiteConnectionPool(_connection_factory, pool_size=DB_POOL_SIZE)
+
+@asynccontextmanager
+async def get_db_connection():
     if not os.path.exists(DB_PATH):
         raise FileNotFoundError(f"Database not found at {DB_PATH}")
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    try:
+    async with pool.connection() as conn:
         yield conn
-    finally:
-        conn.close()
 
-def get_titles_from_ids(movie_ids: List[str]):
+# Backs ORDER BY vote_average DESC, id DESC on /movies (OFFSET and keyset pages alike).
+# Created offline by migrate_db.py; the API never writes to movies.db.
+MOVIES_VOTE_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_movies_vote_id ON movies(vote_average DESC, id DESC)"
+
+# The catalog only changes at ingestion time, so COUNT(*) is cached as (value, timestamp).
+MOVIE_COUNT_TTL_SECONDS = 600
+_movie_count_cache: Optional[Tuple[int, float]] = None
+
+async def get_cached_movie_count(conn: aiosqlite.Connection) -> int:
+    """Returns the number of movies, hitting SQLite at most once per TTL window."""
+    global _movie_count_cache
+    now = time.monotonic()
+    if _movie_count_cache and now - _movie_count_cache[1] < MOVIE_COUNT_TTL_SECONDS:
+        return _movie_count_cache[0]
+    cursor = await conn.execute("SELECT COUNT(*) FROM movies")
+    total = (await cursor.fetchone())[0]
+    _movie_count_cache = (total, now)
+    return total
+
+def invalidate_movie_count():
+    """Drops the cached movie count; call after writing to the movies table."""
+    global _movie_count_cache
+    _movie_count_cache = None
+
+# Mixed into HTTP ETags for catalog endpoints. Seeded from the DB file so a
+# redeploy with a new movies.db invalidates client caches; bumped on writes.
+CATALOG_VERSION = int(os.path.getmtime(DB_PATH)) if os.path.exists(DB_PATH) else 0
+
+def get_catalog_version() -> int:
+    return CATALOG_VERSION
+
+def bump_catalog_version():
+    """Marks the catalog as changed: new ETags for clients and a fresh movie count."""
+    global CATALOG_VERSION
+    CATALOG_VERSION += 1
+    invalidate_movie_count()
+
+async def close_db_pool():
+    await pool.close()
+
+# The id list is bound as one JSON array, so the statement text never changes
+# and the prepared statement is reused (no per-length IN (?, ?, ...) variants,
+# no SQLITE_MAX_VARIABLE_NUMBER limit). The subquery also drops duplicate ids.
+TITLES_BY_IDS_SQL = "SELECT title FROM movies WHERE id IN (SELECT value FROM json_each(?))"
+
+async def get_titles_from_ids(movie_ids: List[str]):
     """Fetches movie titles from SQLite for the selected IDs."""
     if not movie_ids or not os.path.exists(DB_PATH):
         return []
     try:
-        with get_db_connection() as conn:
-            placeholders = ', '.join('?' for _ in movie_ids)
-            query = f"SELECT title FROM movies WHERE id IN ({placeholders})"
-            cursor = conn.execute(query, movie_ids)
-            return [row[0] for row in cursor.fetchall()]
+        async with get_db_connection() as conn:
+            cursor = await conn.execute(TITLES_BY_IDS_SQL, (orjson.dumps(movie_ids).decode(),))
+            return [row[0] for row in await cursor.fetchall()]
     except Exception as e:
-        import logging
-        logging.getLogger(__name__).error(f"SQLite Error: {e}")
+        logger.error(f"SQLite Error: {e}")
         return []
 
+TMDB_POSTER_PREFIX = "https://image.tmdb.org/t/p/w500"
+INVALID_POSTER_VALUES = frozenset({"", "nan", "none", "null"})
+
 def secure_poster_url(m: dict) -> dict:
     """Standardizes poster URL handling for both TMDB paths and full URLs."""
-    raw_path = str(m.get('poster_path', '') or m.get('poster_url', ''))
-    
-    if raw_path and raw_path.lower() != 'nan' and raw_path.strip():
-        raw_path = raw_path.strip()
-        if raw_path.startswith('http'): 
-            m['poster_url'] = raw_path
-        elif raw_path.startswith('/'): 
-            m['poster_url'] = f"https://image.tmdb.org/t/p/w500{raw_path}"
-        else: 
-            # Handle cases where it might be a relative path without leading slash
-            m['poster_url'] = f"https://image.tmdb.org/t/p/w500/{raw_path}"
-    else:
+    # Pop the DB specific field while reading it
+    raw = str(m.pop('poster_path', None) or m.get('poster_url') or "").strip()
+
+    if raw.lower() in INVALID_POSTER_VALUES:
         m['poster_url'] = None
-    
-    # Cleanup DB specific field
-    if 'poster_path' in m: 
-        del m['poster_path']
+    elif raw.startswith('http'):
+        m['poster_url'] = raw
+    else:
+        # Handle cases where it might be a relative path without leading slash
+        m['poster_url'] = f"{TMDB_POSTER_PREFIX}{'' if raw[0] == '/' else '/'}{raw}"
     return m
+
+# SQL twin of secure_poster_url, so list endpoints can build poster URLs inside SQLite.
+POSTER_URL_SQL = f"""CASE
+    WHEN poster_path IS NULL OR lower(trim(poster_path)) IN ({', '.join(f"'{v}'" for v in sorted(INVALID_POSTER_VALUES))}) THEN NULL
+    WHEN substr(trim(poster_path), 1, 4) = 'http' THEN trim(poster_path)
+    WHEN substr(trim(poster_path), 1, 1) = '/' THEN '{TMDB_POSTER_PREFIX}' || trim(poster_path)
+    ELSE '{TMDB_POSTER_PREFIX}/' || trim(poster_path)
+END"""
+
+# poster_url is materialized next to poster_path by migrate_db.py (the backfill only
+# touches rows still missing a derivable URL, so re-runs are no-ops), and list reads
+# select the stored column instead of evaluating POSTER_URL_SQL per row.
+POSTER_URL_COLUMN_EXISTS_SQL = "SELECT 1 FROM pragma_table_info('movies') WHERE name = 'poster_url'"
+ADD_POSTER_URL_COLUMN_SQL = "ALTER TABLE movies ADD COLUMN poster_url TEXT"
+BACKFILL_POSTER_URL_SQL = f"UPDATE movies SET poster_url = {POSTER_URL_SQL} WHERE poster_url IS NULL AND ({POSTER_URL_SQL}) IS NOT NULL"
+
+MOVIE_LIST_COLUMNS = "id, title, overview, release_date, vote_average AS score, poster_url"
+# Same columns for a movies.db that predates the migration
+LEGACY_MOVIE_LIST_COLUMNS = f"id, title, overview, release_date, vote_average AS score, {POSTER_URL_SQL} AS poster_url"
+_movie_list_columns: Optional[str] = None
+
+async def get_movie_list_columns(conn: aiosqlite.Connection) -> str:
+    """MOVIE_LIST_COLUMNS, or its POSTER_URL_SQL twin when movies.db has no poster_url column."""
+    global _movie_list_columns
+    if _movie_list_columns is None:
+        cursor = await conn.execute(POSTER_URL_COLUMN_EXISTS_SQL)
+        _movie_list_columns = MOVIE_LIST_COLUMNS if await cursor.fetchone() else LEGACY_MOVIE_LIST_COLUMNS
+    return _movie_list_columns
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None):
+    # The caller may have been cancelled while its job was queued or running
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+class DBWorker:
+    """Runs sqlite3 jobs on one dedicated thread that owns the connection.
+
+    Jobs are `fn(conn, *args)` callables consumed from a queue in order; each
+    result is handed back to the submitting loop with call_soon_threadsafe, so
+    callers await a plain future instead of a thread-pool hop, and the
+    connection never leaves its thread (no check_same_thread=False, no lock).
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], name: str = "sqlite-worker"):
+        self._connect = connect
+        self._name = name
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    async def submit(self, fn: Callable[..., Any], *args) -> Any:
+        """Queues `fn(conn, *args)` and waits for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._ensure_started()
+        self._queue.put((fn, args, loop, future))
+        return await future
+
+    def _run(self):
+        conn: Optional[sqlite3.Connection] = None
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            fn, args, loop, future = job
+            try:
+                # Opened on first use, so a failed open is reported to that caller and retried by the next
+                if conn is None:
+                    conn = self._connect()
+                result, error = fn(conn, *args), None
+            except Exception as e:
+                result, error = None, e
+            try:
+                loop.call_soon_threadsafe(_resolve, future, result, error)
+            except RuntimeError:
+                # Submitting loop has already been closed
+                pass
+        if conn is not None:
+            conn.close()
+
+    def close(self, timeout: float = 5.0):
+        """Drains queued jobs, closes the connection and stops the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning(f"{self._name} did not stop within {timeout}s")
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from typing import List, Optional
+import google.generativeai as genai
+from google.api_core.exceptions import InvalidArgument
+
+logger = logging.getLogger(__name__)
+
+# Failures that can be caused by one query in the batch (a 400 from the API, or a
+# response with a vector missing). Anything else (quota, auth, network) would hit
+# every per-query retry too, so it fails the whole batch instead.
+INPUT_ERRORS = (InvalidArgument, ValueError)
+
+async def collect_batch(queue: asyncio.Queue, max_size: int, wait_seconds: float) -> list:
+    """Waits for one item, then gathers more until the batch is full or the window closes."""
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + wait_seconds
+    while len(batch) < max_size:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+class EmbedBatcher:
+    """Coalesces concurrent retrieval-query embeddings into one embed_content call.
+
+    text-embedding-004 accepts a list of contents, so requests arriving within
+    `max_wait_ms` of each other share a single round-trip.
+    """
+
+    def __init__(self, max_batch: int = 32, max_wait_ms: float = 10, model: str = "models/text-embedding-004"):
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.model = model
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Starts the drain task on the running loop (called from the app lifespan)."""
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run(self._queue))
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, text: str) -> List[float]:
+        """Queues a text and waits for its vector from the next batch."""
+        loop = asyncio.get_running_loop()
+        # Outside the lifespan (scripts, tests) the worker is started on first use
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self.start()
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        emb_response = await asyncio.to_thread(
+            genai.embed_content,
+            model=self.model,
+            content=texts,
+            task_type="retrieval_query"
+        )
+        vectors = emb_response['embedding']
+        # zip() would silently leave the trailing callers waiting forever
+        if len(vectors) != len(texts):
+            raise ValueError(f"embed_content returned {len(vectors)} vectors for {len(texts)} queries")
+        return vectors
+
+    async def _embed_one(self, text: str, future: asyncio.Future):
+        if future.done():
+            return
+        try:
+            vec = (await self._embed([text]))[0]
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(vec)
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            batch = await collect_batch(queue, self.max_batch, self.max_wait_seconds)
+            try:
+                vectors = await self._embed([text for text, _ in batch])
+            except Exception as e:
+                logger.error(f"Batched embedding failed ({len(batch)} queries): {e}")
+                if len(batch) > 1 and isinstance(e, INPUT_ERRORS):
+                    # One bad input must not fail its neighbours: retry each query on its own
+                    await asyncio.gather(*(self._embed_one(text, future) for text, future in batch))
+                else:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                continue
+            for (_, future), vec in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vec)
+
+# Singleton instance
+embed_batcher = EmbedBatcher()
@@ -0,0 +1,20 @@
+import logging
+import logging.handlers
+import queue
+from app.config import LOG_LEVEL
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Routes root log records through a queue; a background listener thread does the stderr writes."""
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
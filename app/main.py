@@ -1,9 +1,28 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.database import close_db_pool
+from app.logging_config import setup_logging
 from app.routers import movies, recommend
+from app.services.recommendation import recommendation_service
+from app.services.semantic_cache import semantic_cache
+
+# --- LIFESPAN ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener = setup_logging()
+    # Warm the AI connections in the background so boot is never blocked on them
+    warm_up = asyncio.create_task(recommendation_service.warm_up())
+    yield
+    warm_up.cancel()
+    await semantic_cache.close()
+    await close_db_pool()
+    log_listener.stop()
 
 # --- APP CONFIGURATION ---
-app = FastAPI(title="ScreenScout Intelligence Engine", version="PRODUCTION")
+app = FastAPI(title="ScreenScout Intelligence Engine", version="PRODUCTION", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,20 @@
+import base64
+import json
+from typing import Tuple
+
+from fastapi import HTTPException
+
+# Keyset cursors shared by both /movies implementations (app.routers.movies and
+# the root main.py), so a client walks either service with the same token.
+
+def encode_cursor(score: float, movie_id: str) -> str:
+    """Packs the (vote_average, id) of the last row into an opaque URL-safe token."""
+    raw = json.dumps([score, movie_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        score, movie_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), str(movie_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Any, Callable, Hashable, List, Optional
+from app.embed_batcher import collect_batch
+
+logger = logging.getLogger(__name__)
+
+class PineconeBatcher:
+    """Coalesces concurrent Pinecone searches arriving within a short window.
+
+    Pinecone's query endpoint takes a single vector, so a window is fanned out
+    together over the SDK's pooled connections, and callers that pass the same
+    `key` (e.g. a quantized-vector cache key) share one query and its result.
+    """
+
+    def __init__(self, index: Any, max_batch: int = 16, max_wait_ms: float = 8,
+                 postprocess: Optional[Callable[[Any], Any]] = None):
+        self.index = index
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.postprocess = postprocess
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight = set()
+
+    def start(self):
+        """Starts the drain task on the running loop (called from the app lifespan)."""
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run(self._queue))
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, query_vec: List[float], top_k: int, key: Optional[Hashable] = None):
+        """Queues a search and waits for the (possibly shared) result of its batch."""
+        loop = asyncio.get_running_loop()
+        # Outside the lifespan (scripts, tests) the worker is started on first use
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self.start()
+        future = loop.create_future()
+        await self._queue.put((key, query_vec, top_k, future))
+        return await future
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            batch = await collect_batch(queue, self.max_batch, self.max_wait_seconds)
+            # Keep collecting the next window while this one waits on Pinecone
+            task = asyncio.create_task(self._search_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _search_batch(self, batch: list):
+        groups = {}
+        for key, query_vec, top_k, future in batch:
+            group_key = (key, top_k) if key is not None else id(future)
+            groups.setdefault(group_key, (query_vec, top_k, []))[2].append(future)
+        await asyncio.gather(*(self._search_one(*group) for group in groups.values()))
+
+    async def _search_one(self, query_vec: List[float], top_k: int, futures: list):
+        try:
+            results = await asyncio.to_thread(self.index.query, vector=query_vec, top_k=top_k, include_metadata=True)
+            if self.postprocess is not None:
+                results = self.postprocess(results)
+        except Exception as e:
+            logger.error(f"Pinecone search failed ({len(futures)} callers): {e}")
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future in futures:
+            if not future.done():
+                future.set_result(results)
@@ -1,44 +1,101 @@
-from fastapi import APIRouter, Query, HTTPException
-from app.database import get_db_connection, secure_poster_url
-import sqlite3
+import hashlib
+import logging
+from typing import Optional, Tuple
+import aiosqlite
+import orjson
+from fastapi import APIRouter, Header, Query, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from app.database import get_catalog_version, get_db_connection, get_cached_movie_count, get_movie_list_columns
+from app.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# The catalog only changes at ingestion time, so pages are safe for CDNs/browsers to reuse.
+MOVIES_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=60"
+
+def movies_etag(page: int, limit: int, cursor: Optional[str]) -> str:
+    key = f"{get_catalog_version()}:{page}:{limit}:{cursor or ''}"
+    return f'W/"{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}"'
+
+async def fetch_movies_page(conn: aiosqlite.Connection, page: int, limit: int, after: Optional[Tuple[float, str]]) -> list:
+    # Column renames and poster URLs are resolved by SQLite (see MOVIE_LIST_COLUMNS)
+    columns = await get_movie_list_columns(conn)
+    if after:
+        cur = await conn.execute(
+            f"SELECT {columns} FROM movies WHERE (vote_average, id) < (?, ?) "
+            "ORDER BY vote_average DESC, id DESC LIMIT ?",
+            (*after, limit),
+        )
+    else:
+        # No cursor: page 1 starts at (+inf, +inf); deeper pages keep the legacy OFFSET path.
+        cur = await conn.execute(
+            f"SELECT {columns} FROM movies ORDER BY vote_average DESC, id DESC LIMIT ? OFFSET ?",
+            (limit, (page - 1) * limit),
+        )
+    return await cur.fetchall()
+
+async def stream_movies_page(rows: list, page: int, limit: int, total: int):
+    """Yields the /movies JSON document row by row: encode -> write.
+
+    The rows are read before the response starts (a page is at most 100 of
+    them), so a DB error becomes a 500 instead of a truncated 200 page.
+    """
+    yield b'{"data":['
+    # Unpacked in MOVIE_LIST_COLUMNS order
+    for i, (movie_id, title, overview, release_date, score, poster_url) in enumerate(rows):
+        m = {
+            "id": movie_id, "title": title, "overview": overview,
+            "release_date": release_date, "score": score, "poster_url": poster_url,
+        }
+        yield orjson.dumps(m) if i == 0 else b"," + orjson.dumps(m)
+
+    next_cursor = None
+    if rows and len(rows) == limit:
+        movie_id, _, _, _, score, _ = rows[-1]
+        next_cursor = encode_cursor(score, movie_id)
+
+    meta = {
+        "current_page": page,
+        "limit": limit,
+        "total_items": total,
+        "total_pages": (total + limit - 1) // limit,
+        "next_cursor": next_cursor
+    }
+    yield b'],"meta":' + orjson.dumps(meta) + b"}"
+
 @router.get("/movies")
-def get_movies(page: int = Query(1, ge=1), limit: int = Query(24, ge=1, le=100)):
-    """Reads directly from the movies.db file for the homepage."""
-    offset = (page - 1) * limit
+async def get_movies(
+    page: int = Query(1, ge=1),
+    limit: int = Query(24, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Reads directly from the movies.db file for the homepage.
+
+    Pass the `next_cursor` from a previous response to seek straight to the
+    following page via the (vote_average, id) index instead of OFFSET scanning.
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    etag = movies_etag(page, limit, cursor)
+    cache_headers = {"ETag": etag, "Cache-Control": MOVIES_CACHE_CONTROL}
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        # Client already holds this page: answer without touching SQLite
+        return Response(status_code=304, headers=cache_headers)
 
     try:
-        with get_db_connection() as conn:
-            # Use 'vote_average' as confirmed by schema check, mapping to 'score'
-            cursor = conn.execute("SELECT * FROM movies ORDER BY vote_average DESC LIMIT ? OFFSET ?", (limit, offset))
-            rows = cursor.fetchall()
-            
-            results = []
-            for row in rows:
-                m = dict(row)
-                
-                # Map DB column 'vote_average' to API field 'score'
-                if 'vote_average' in m:
-                    m['score'] = m['vote_average']
-                
-                # Secure Poster Handling using helper
-                m = secure_poster_url(m)
-                
-                results.append(m)
-
-            total = conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
-
-        return {
-            "data": results,
-            "meta": {
-                "current_page": page,
-                "limit": limit,
-                "total_items": total,
-                "total_pages": (total + limit - 1) // limit
-            }
-        }
+        async with get_db_connection() as conn:
+            total = await get_cached_movie_count(conn)
+            rows = await fetch_movies_page(conn, page, limit, after)
     except Exception as e:
-        print(f"DB Error: {e}")
-        raise HTTPException(status_code=500, detail="Database Read Error")
+        logger.exception(f"DB Error on /movies (page={page}): {e}")
+        # Validators and Cache-Control only ever go out with a fully read page
+        raise HTTPException(status_code=500, detail="Database Read Error", headers={"Cache-Control": "no-store"})
+
+    return StreamingResponse(
+        stream_movies_page(rows, page, limit, total),
+        media_type="application/json",
+        headers=cache_headers,
+    )
@@ -1,6 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import List, Optional
 
 class RecommendationRequest(BaseModel):
     query: str 
     selected_movie_ids: List[str] = []
+    no_cache: bool = False
+
+    @field_validator("selected_movie_ids")
+    @classmethod
+    def normalize_movie_ids(cls, ids: List[str]) -> List[str]:
+        """IDs are TEXT primary keys (e.g. 'tt0111161'); strip and de-duplicate once here."""
+        return list(dict.fromkeys(i.strip() for i in ids if i and i.strip()))
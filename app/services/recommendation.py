@@ -1,56 +1,125 @@
-import traceback
-import json
+import asyncio
+import functools
+import string
+from array import array
+import orjson
 from pinecone import Pinecone
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential_jitter
 import google.generativeai as genai
 from app.config import PINECONE_KEY, GEMINI_KEY
 from app.database import get_titles_from_ids, secure_poster_url
 from app.schemas import RecommendationRequest
+from app.services.semantic_cache import semantic_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Gemini only needs the gist of each candidate; capping overviews bounds prompt tokens.
+MAX_OVERVIEW_CHARS = 300
+
+# Static RAG prompt, parsed once; per request only the placeholders are filled in.
+PROMPT_TEMPLATE = string.Template("""User Query: "$query"
+User Likes: $likes
+
+Candidates:
+$candidates
+
+Pick top 5. Return JSON:
+{
+    "reasoning": "Short explanation",
+    "movie_ids": ["id1", "id2"]
+}""")
+
+@functools.lru_cache(maxsize=1024)
+def _embed_sync(text: str) -> array:
+    """Embeds a retrieval query; exact repeats are served from the LRU.
+
+    Vectors are kept as float32 arrays (~3 KB each, ~3 MB when full) rather
+    than lists of Python floats, which would be ~8x larger.
+    """
+    emb_response = genai.embed_content(
+        model="models/text-embedding-004",
+        content=text,
+        task_type="retrieval_query"
+    )
+    return array('f', emb_response['embedding'])
+
 class RecommendationService:
     def __init__(self):
         self.pc = None
         self.index = None
         self.chat_model = None
-        self.init_ai_services()
+        self._ready = False
+        self._ready_lock = asyncio.Lock()
 
     def init_ai_services(self):
+        """Blocking SDK setup; raises so the caller can retry."""
+        self.pc = Pinecone(api_key=PINECONE_KEY)
+        self.index = self.pc.Index("screenscout-google-v1") 
+        logger.info("[Service] Connected to Pinecone.")
+
+        genai.configure(api_key=GEMINI_KEY)
+        self.chat_model = genai.GenerativeModel('gemini-2.0-flash')
+        logger.info("[Service] Connected to Gemini (2.0-flash).")
+
+    async def _ensure_ready(self):
+        """Connects to Pinecone/Gemini on first use, retrying transient failures."""
+        if self._ready:
+            return
+        async with self._ready_lock:
+            if self._ready:
+                return
+            if not (PINECONE_KEY and GEMINI_KEY):
+                raise RuntimeError("PINECONE_KEY and GEMINI_KEY must be set")
+            async for attempt in AsyncRetrying(stop=stop_after_attempt(3), wait=wait_exponential_jitter(), reraise=True):
+                with attempt:
+                    await asyncio.to_thread(self.init_ai_services)
+            self._ready = True
+
+    async def warm_up(self):
+        """Opens the Pinecone/Gemini connections ahead of the first /recommend.
+
+        Both SDK clients keep their connections alive (urllib3 pool / gRPC
+        channel), so only the first call pays for TCP + TLS setup.
+        """
         try:
-            if PINECONE_KEY:
-                self.pc = Pinecone(api_key=PINECONE_KEY)
-                self.index = self.pc.Index("screenscout-google-v1") 
-                logger.info("[Service] Connected to Pinecone.")
-            
-            if GEMINI_KEY:
-                genai.configure(api_key=GEMINI_KEY)
-                self.chat_model = genai.GenerativeModel('gemini-2.0-flash')
-                logger.info("[Service] Connected to Gemini (1.5-flash).")
+            await self._ensure_ready()
+            await asyncio.to_thread(self.index.describe_index_stats)
+            logger.info("[Service] AI connections warmed up.")
         except Exception as e:
-            logger.error(f"[Service] Discovery Error: {e}")
+            logger.warning(f"[Service] Warm-up skipped: {e}")
 
     async def generate_recommendations(self, req: RecommendationRequest):
         try:
-            # 1. SETUP
-            selected_titles = get_titles_from_ids(req.selected_movie_ids)
+            # 1. SETUP (first call also brings up the AI clients, overlapped with the title lookup)
+            try:
+                selected_titles, _ = await asyncio.gather(
+                    get_titles_from_ids(req.selected_movie_ids),
+                    self._ensure_ready()
+                )
+            except Exception as init_err:
+                logger.error(f"[Service] Discovery Error: {init_err}")
+                return {"error": f"AI SERVICES UNAVAILABLE: {str(init_err)}", "movies": []}
             augmented_query = f"Movies similar to {', '.join(selected_titles)}. Context: {req.query}" if selected_titles else req.query
-            logger.debug(f"[DEBUG] Embedding Query -> {augmented_query[:50]}...")
+            logger.debug("[DEBUG] Embedding Query -> %s...", augmented_query[:50])
 
-            # 2. EMBED
+            # 2. EMBED (blocking SDK call runs on a worker thread, not the event loop)
             try:
-                emb_response = genai.embed_content(
-                    model="models/text-embedding-004",
-                    content=augmented_query,
-                    task_type="retrieval_query"
-                )
-                query_vec = emb_response['embedding']
+                query_vec = list(await asyncio.to_thread(_embed_sync, augmented_query))
             except Exception as embed_err:
                 return {"error": f"GOOGLE EMBEDDING FAILED: {str(embed_err)}", "movies": []}
+
+            # 2b. SEMANTIC CACHE (near-duplicate queries skip Pinecone + Gemini)
+            if not req.no_cache:
+                cached = await semantic_cache.lookup(query_vec, req.selected_movie_ids)
+                if cached is not None:
+                    logger.debug("[DEBUG] Semantic cache hit.")
+                    return cached
             
             # 3. SEARCH PINECONE
             try:
-                results = self.index.query(
+                results = await asyncio.to_thread(
+                    self.index.query,
                     vector=query_vec, 
                     top_k=40,
                     include_metadata=True
@@ -63,44 +132,46 @@ class RecommendationService:
                  return {"ai_reasoning": "I couldn't find any matches. Try a broader search.", "movies": []}
 
             # 5. PREPARE AI CONTEXT
-            context_text = ""
-            for match in results['matches']:
-                m = match['metadata']
-                context_text += f"ID: {match['id']} | Title: {m.get('title')} | Overview: {m.get('overview')}\n"
+            by_id = {match['id']: match for match in results['matches']}
+            context_text = "\n".join(
+                f"ID: {mid} | Title: {match['metadata'].get('title')} | Overview: {(match['metadata'].get('overview') or '')[:MAX_OVERVIEW_CHARS]}"
+                for mid, match in by_id.items()
+            )
 
             # 6. ASK GEMINI (RAG)
-            prompt = f"""
-            User Query: "{req.query}"
-            User Likes: {", ".join(selected_titles)}
-            
-            Candidates:
-            {context_text}
-            
-            Pick top 5. Return JSON:
-            {{
-                "reasoning": "Short explanation",
-                "movie_ids": ["id1", "id2"]
-            }}
-            """
+            prompt = PROMPT_TEMPLATE.substitute(
+                query=req.query,
+                likes=", ".join(selected_titles),
+                candidates=context_text
+            )
+            fallback_ids = [m['id'] for m in results['matches'][:5]]
             
             ai_data = {}
+            ai_ok = True
             try:
-                response = self.chat_model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-                ai_data = json.loads(response.text)
+                response = await asyncio.to_thread(
+                    self.chat_model.generate_content,
+                    prompt,
+                    generation_config={"response_mime_type": "application/json"}
+                )
+                ai_data = orjson.loads(response.text)
             except Exception as ai_err:
                  logger.error(f"AI Generation Error: {ai_err}")
+                 ai_ok = False
                  ai_data = {
                      "reasoning": "Here are the most relevant movies from our database.",
-                     "movie_ids": [m['id'] for m in results['matches'][:5]]
+                     "movie_ids": fallback_ids
                  }
 
             # 7. ASSEMBLE RESPONSE
             final_movies = []
             target_ids = ai_data.get("movie_ids", [])
-            if not target_ids: target_ids = [m['id'] for m in results['matches'][:5]]
+            if not target_ids: target_ids = fallback_ids
 
-            for match in results['matches']:
-                if match['id'] in target_ids:
+            # Walk the AI's picks in order so its ranking is preserved
+            for mid in dict.fromkeys(str(t) for t in target_ids):
+                match = by_id.get(mid)
+                if match:
                     m = match['metadata']
                     # Use helper for consistent poster logic
                     m = secure_poster_url(m)
@@ -113,13 +184,17 @@ class RecommendationService:
                         "score": match['score']
                     })
             
-            return {
+            payload = {
                 "ai_reasoning": ai_data.get("reasoning"),
                 "movies": final_movies
             }
+            # Only cache real AI picks; a fallback answer should not be pinned for hours.
+            if ai_ok:
+                await semantic_cache.store(query_vec, req.selected_movie_ids, payload)
+            return payload
 
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("[Service] Recommendation failed")
             return {"error": f"SERVER ERROR: {str(e)}", "movies": []}
 
 # Singleton instance
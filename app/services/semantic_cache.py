@@ -0,0 +1,117 @@
+import asyncio
+import time
+import logging
+from typing import List, Optional
+import aiosqlite
+import orjson
+from app.config import SEMANTIC_CACHE_PATH
+
+try:
+    import sqlite_vec
+except ImportError:  # Optional: without sqlite-vec the cache simply stays disabled.
+    sqlite_vec = None
+
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """Nearest-neighbour cache of /recommend responses, keyed by query embedding.
+
+    Entries are partitioned by the user's selected movie IDs so that the same
+    query with a different selection never shares a cached answer.
+    """
+
+    def __init__(self, path: str, dimensions: int = 768, min_similarity: float = 0.95, ttl_seconds: int = 6 * 3600):
+        self.path = path
+        self.dimensions = dimensions
+        self.max_distance = 1.0 - min_similarity
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._disabled = sqlite_vec is None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> Optional[aiosqlite.Connection]:
+        if self._conn or self._disabled:
+            return self._conn
+        async with self._lock:
+            if self._conn is None and not self._disabled:
+                conn = None
+                try:
+                    conn = await aiosqlite.connect(self.path)
+                    await conn.enable_load_extension(True)
+                    await conn.load_extension(sqlite_vec.loadable_path())
+                    await conn.enable_load_extension(False)
+                    await conn.execute(
+                        "CREATE VIRTUAL TABLE IF NOT EXISTS rec_cache USING vec0("
+                        "selection TEXT partition key, "
+                        f"embedding float[{self.dimensions}] distance_metric=cosine, "
+                        "ts INTEGER, "
+                        "+response TEXT)"
+                    )
+                    await conn.commit()
+                    self._conn = conn
+                    logger.info(f"[Cache] Semantic cache ready at {self.path}.")
+                except Exception as e:
+                    logger.warning(f"[Cache] Semantic cache disabled: {e}")
+                    # An open connection keeps its non-daemon worker thread alive
+                    if conn is not None:
+                        await conn.close()
+                    self._disabled = True
+        return self._conn
+
+    @staticmethod
+    def _selection_key(selected_movie_ids: List[str]) -> str:
+        return ",".join(sorted(set(selected_movie_ids)))
+
+    async def lookup(self, embedding: List[float], selected_movie_ids: List[str]) -> Optional[dict]:
+        """Returns a cached response for a near-identical query, or None on a miss."""
+        conn = await self._connect()
+        if conn is None:
+            return None
+        try:
+            cursor = await conn.execute(
+                "SELECT response, distance FROM rec_cache "
+                "WHERE embedding MATCH ? AND k = 1 AND selection = ? AND ts >= ?",
+                (
+                    sqlite_vec.serialize_float32(embedding),
+                    self._selection_key(selected_movie_ids),
+                    int(time.time()) - self.ttl_seconds,
+                ),
+            )
+            row = await cursor.fetchone()
+        except Exception as e:
+            logger.error(f"[Cache] Lookup Error: {e}")
+            return None
+        if row is None or row[1] > self.max_distance:
+            return None
+        return orjson.loads(row[0])
+
+    async def store(self, embedding: List[float], selected_movie_ids: List[str], response: dict):
+        conn = await self._connect()
+        if conn is None:
+            return
+        now = int(time.time())
+        try:
+            await conn.execute(
+                "DELETE FROM rec_cache WHERE rowid IN (SELECT rowid FROM rec_cache WHERE ts < ?)",
+                (now - self.ttl_seconds,),
+            )
+            await conn.execute(
+                "INSERT INTO rec_cache(selection, embedding, ts, response) VALUES (?, ?, ?, ?)",
+                (
+                    self._selection_key(selected_movie_ids),
+                    sqlite_vec.serialize_float32(embedding),
+                    now,
+                    orjson.dumps(response).decode(),
+                ),
+            )
+            await conn.commit()
+        except Exception as e:
+            logger.error(f"[Cache] Store Error: {e}")
+
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+# Singleton instance
+semantic_cache = SemanticCache(SEMANTIC_CACHE_PATH)
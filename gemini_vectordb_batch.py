@@ -38,6 +38,9 @@ print(f"Total Movies to Ingest: {len(df)}")
 
 # 4. Batch Processing Function
 BATCH_SIZE = 100  # Google allows up to 100-250 per call
+# The API only ever reads title/overview/poster_path back, and the RAG prompt
+# only uses an overview prefix, so anything more is wasted query payload.
+OVERVIEW_MAX_CHARS = 300
 
 def generate_embeddings_batch(texts):
     # Google API expects a list of strings
@@ -69,9 +72,7 @@ for i in tqdm(range(0, len(df), BATCH_SIZE)):
             metadata = {
                 "title": str(row['title']),
                 "poster_path": str(row['poster_path']),
-                "overview": str(row['overview'])[:500],
-                "release_date": str(row['release_date']),
-                "vote_average": str(row['vote_average'])
+                "overview": str(row['overview'])[:OVERVIEW_MAX_CHARS]
             }
             # ID must be string
             vectors_to_upsert.append((str(row['id']), embeddings[j], metadata))
@@ -1,23 +1,82 @@
+from contextlib import aclosing, asynccontextmanager, closing
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from pinecone import Pinecone
 import google.generativeai as genai
 import os
 import sqlite3
-from typing import List, Optional
-import traceback 
+import aiosqlite
+from typing import Dict, List, Optional
 import httpx
 import logging
 import asyncio
-from app.database import secure_poster_url
+import hashlib
+import time
+from array import array
+from pathlib import Path
+import numpy as np
+import polars as pl
+import orjson
+from app.cache import QueryCache
+from app.db_worker import DBWorker
+from app.embed_batcher import embed_batcher
+from app.pagination import decode_cursor, encode_cursor
+from app.pinecone_batcher import PineconeBatcher
+from app.database import (
+    CONNECTION_PRAGMAS, POSTER_URL_COLUMN_EXISTS_SQL, POSTER_URL_SQL, TITLES_BY_IDS_SQL, secure_poster_url,
+)
 
 # --- LOGGING CONFIGURATION ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# --- SHARED HTTP CLIENT ---
+# One pooled keep-alive client for all OMDB traffic instead of a new TLS session per request.
+OMDB_CLIENT: Optional[httpx.AsyncClient] = None
+
+def build_omdb_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        # Fail fast when OMDB is unreachable; enrichment is optional for every response
+        timeout=httpx.Timeout(5.0, connect=2.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    )
+
+def get_omdb_client() -> httpx.AsyncClient:
+    """Returns the shared client, creating it if called outside the app lifespan (e.g. verify scripts)."""
+    global OMDB_CLIENT
+    if OMDB_CLIENT is None or OMDB_CLIENT.is_closed:
+        OMDB_CLIENT = build_omdb_client()
+    return OMDB_CLIENT
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global OMDB_CLIENT
+    if os.path.exists(DB_PATH):
+        try:
+            app.state.db = await open_db()
+        except Exception as e:
+            # db_connection() falls back to one-off connections
+            logger.warning(f"Could not open movies.db at startup: {e}")
+        try:
+            await asyncio.to_thread(load_movies_frame)
+        except Exception as e:
+            logger.warning(f"Catalog preload failed, will retry on first /movies: {e}")
+    OMDB_CLIENT = build_omdb_client()
+    embed_batcher.start()
+    pinecone_batcher.start()
+    yield
+    await pinecone_batcher.stop()
+    await embed_batcher.stop()
+    await OMDB_CLIENT.aclose()
+    if getattr(app.state, "db", None) is not None:
+        await app.state.db.close()
+    await asyncio.to_thread(close_omdb_cache_db)
+
 # --- APP CONFIGURATION ---
-app = FastAPI(title="ScreenScout Intelligence Engine", version="PRODUCTION")
+app = FastAPI(title="ScreenScout Intelligence Engine", version="PRODUCTION", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +94,62 @@ OMDB_API_KEY = os.getenv("OMDB_API_KEY")
 
 # Database Path
 DB_PATH = os.path.join(os.path.dirname(__file__), "movies.db")
+# Read-only: the API never writes the catalog, so a root-owned movies.db works as is
+DB_URI = f"{Path(DB_PATH).resolve().as_uri()}?mode=ro"
+
+# --- RAG PROMPT ---
+# The instructions never change, so they go first as the system instruction
+# and each request sends only the dynamic part: query, likes and candidates.
+RAG_INSTRUCTIONS = """You pick movie recommendations from a list of candidates. Each request gives the user's query, the movies they already like and the candidates, one per line as "- <id>: <title> — <overview>".
+
+Task:
+1. Select the Top 15 movies that best match the user's query and taste.
+2. Provide a specific, unique reason for why THIS user would like EACH movie. Do not use generic descriptions like "A great movie". Use the context of the user's query and likes.
+
+Return JSON:
+{
+    "movie_ids": ["id1", "id2", ...],
+    "reasoning": {
+        "id1": "Custom reason 1...",
+        "id2": "Custom reason 2..."
+    }
+}"""
+
+# Gemini only needs the gist of a candidate to rank it; capping overviews keeps the
+# first sentence or two and bounds the prompt's token count.
+MAX_OVERVIEW_CHARS = 240
+
+def prompt_overview(overview: Optional[str]) -> str:
+    """Overview cut to MAX_OVERVIEW_CHARS, ending on a sentence (or else word) boundary."""
+    text = (overview or "").strip()
+    if len(text) <= MAX_OVERVIEW_CHARS:
+        return text
+    sentence_end = text.rfind(". ", 0, MAX_OVERVIEW_CHARS + 1)
+    if sentence_end >= MAX_OVERVIEW_CHARS // 2:
+        return text[:sentence_end + 1]
+    return text[:MAX_OVERVIEW_CHARS].rsplit(" ", 1)[0] + "…"
+
+# Plain str.format_map: placeholders are located in C, without string.Template's regex.
+# Only the template is parsed, so braces inside queries or overviews are safe.
+PROMPT_TEMPLATE = """User Query: "{query}"
+User Likes: {likes}
+
+Candidates:
+{candidates}"""
+
+GEMINI_MODEL = 'gemini-2.0-flash'
+# Shared by every call; the SDK copies it before use
+GEMINI_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+def parse_ai_json(text: str) -> dict:
+    """Parses Gemini's JSON reply, tolerating prose or ``` fences around the object."""
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end < start:
+            raise
+        return orjson.loads(text[start:end + 1])
 
 # --- SERVICE INITIALIZATION ---
 if not PINECONE_KEY:
@@ -42,6 +157,7 @@ if not PINECONE_KEY:
 if not GEMINI_KEY:
     logger.critical("GEMINI_KEY not found in Environment Variables!")
 
+pc = index = chat_model = None
 try:
     if PINECONE_KEY:
         pc = Pinecone(api_key=PINECONE_KEY)
@@ -51,51 +167,366 @@ try:
     if GEMINI_KEY:
         genai.configure(api_key=GEMINI_KEY)
         # Using gemini-1.5-flash-latest for better compatibility
-        chat_model = genai.GenerativeModel('gemini-2.0-flash')
+        chat_model = genai.GenerativeModel(GEMINI_MODEL, system_instruction=RAG_INSTRUCTIONS)
         logger.info("Connected to Gemini (2.0-flash).")
 
 except Exception as e:
     logger.error(f"Startup Error: {e}")
 
+# --- EMBEDDING CACHE ---
+# Query vectors are kept as float32 arrays (~3 KB each) so a full cache stays around 6 MB.
+EMBED_CACHE = QueryCache(max_size=2048, ttl_seconds=3600)
+
+def embedding_cache_key(query: str, selected_movie_ids: List[str]) -> bytes:
+    """Keys on the normalized query plus the sorted selection, which fully determines the augmented query."""
+    normalized = f"{query.strip().lower()}\x1f{','.join(sorted(selected_movie_ids))}"
+    return hashlib.blake2b(normalized.encode()).digest()
+
+# --- SEARCH RESULT CACHE ---
+# Each entry holds ~50 matches with metadata (~80 KB), so the size is kept well
+# inside the 512 MB instance budget rather than matching the embedding cache.
+SEARCH_CACHE = QueryCache(max_size=256, ttl_seconds=600)
+SEARCH_CACHE_STATS = {"near_hits": 0}
+
+def search_cache_key(query_vec: List[float], top_k: int) -> bytes:
+    """Buckets nearby query vectors together by quantizing each component to 1/64."""
+    bucket = np.round(np.asarray(query_vec, dtype=np.float32) * 64).astype(np.int8).tobytes()
+    return hashlib.blake2b(bucket + top_k.to_bytes(2, "little")).digest()
+
+def clear_search_cache():
+    """Drops cached Pinecone results; call after upserting vectors into the index."""
+    SEARCH_CACHE.clear()
+
+# Pinecone has no per-field metadata projection, so matches are cut down to the
+# fields /recommend reads before they are cached or handed to the request.
+PINECONE_METADATA_KEYS = ("title", "overview", "poster_path")
+
+def slim_results(results) -> dict:
+    return {
+        "matches": [
+            {
+                "id": match['id'],
+                "score": match['score'],
+                "metadata": {k: (match.get('metadata') or {}).get(k) for k in PINECONE_METADATA_KEYS}
+            }
+            for match in results['matches']
+        ]
+    }
+
+# --- LOCAL ANN OVER RECENT SEARCHES ---
+# A ring of the last few hundred searched query vectors. On an exact
+# search-cache miss, the nearest recent vector above the similarity threshold
+# lends its cached Pinecone results, catching paraphrases that quantize into a
+# different bucket. Vectors are unit-normalized and stored as int8 with one
+# scale per row (256 x 768 B = 192 KB), a quarter of the float32 footprint.
+RECENT_SEARCH_SLOTS = 256
+RECENT_SEARCH_MIN_SIMILARITY = 0.97
+_recent_vecs = np.zeros((RECENT_SEARCH_SLOTS, 768), dtype=np.int8)
+_recent_scales = np.zeros(RECENT_SEARCH_SLOTS, dtype=np.float32)
+_recent_keys: List[Optional[bytes]] = [None] * RECENT_SEARCH_SLOTS
+_recent_next = 0
+
+def _int8_dots(matrix, q):
+    # NumPy has no BLAS path for integer matmul; float32 holds these
+    # sums exactly (|dot| <= 768 * 127^2 < 2^24) and stays vectorized.
+    return matrix.astype(np.float32) @ q.astype(np.float32)
+
+def quantize(query_vec: List[float]):
+    """Unit-normalizes a vector and maps it to int8 with a symmetric per-vector scale."""
+    vec = np.asarray(query_vec, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    if norm:
+        vec = vec / norm
+    peak = float(np.abs(vec).max()) if vec.size else 0.0
+    scale = peak / 127 if peak else 1.0
+    return np.round(vec / scale).astype(np.int8), np.float32(scale)
+
+def nearest_recent_search(query_vec: List[float]) -> Optional[bytes]:
+    """Search-cache key of the most similar recent query, if it is close enough."""
+    if len(query_vec) != _recent_vecs.shape[1]:
+        return None
+    q, q_scale = quantize(query_vec)
+    scores = _int8_dots(_recent_vecs, q) * (_recent_scales * q_scale)
+    best = int(np.argmax(scores))
+    if scores[best] >= RECENT_SEARCH_MIN_SIMILARITY:
+        return _recent_keys[best]
+    return None
+
+def remember_search(query_vec: List[float], key: bytes):
+    global _recent_next
+    if len(query_vec) != _recent_vecs.shape[1]:
+        return
+    _recent_vecs[_recent_next], _recent_scales[_recent_next] = quantize(query_vec)
+    _recent_keys[_recent_next] = key
+    _recent_next = (_recent_next + 1) % RECENT_SEARCH_SLOTS
+
+# --- PINECONE SEARCH BATCHER ---
+pinecone_batcher = PineconeBatcher(index, max_batch=16, max_wait_ms=8, postprocess=slim_results)
+
 # --- DATA MODELS ---
 class RecommendationRequest(BaseModel):
     query: str 
     selected_movie_ids: List[str] = []
 
+# --- DATABASE ---
+def connect_db() -> sqlite3.Connection:
+    """Opens a blocking read-only handle on movies.db for one-off work (catalog load)."""
+    conn = sqlite3.connect(DB_URI, uri=True, isolation_level=None)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+async def open_db() -> aiosqlite.Connection:
+    """Opens the long-lived read-only request connection: 64 MB page cache, memory-mapped reads."""
+    # Rows stay plain tuples: every reader selects explicit columns and unpacks by position
+    conn = await aiosqlite.connect(DB_URI, uri=True)
+    for pragma in CONNECTION_PRAGMAS:
+        await conn.execute(pragma)
+    return conn
+
+@asynccontextmanager
+async def db_connection():
+    """Yields app.state.db; outside the lifespan (e.g. verify scripts) a one-off
+    connection is opened and closed, as its worker thread would otherwise keep the process alive."""
+    db = getattr(app.state, "db", None)
+    if db is not None:
+        yield db
+        return
+    db = await open_db()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+# --- HOMEPAGE CATALOG ---
+# movies.db is static per deploy, so /movies pages are sliced from an in-memory
+# columnar copy (~0.6 MB), sorted once at load, instead of querying SQLite per page.
+MOVIES_DF: Optional[pl.DataFrame] = None
+# Response fields only: poster_path is superseded by the stored poster_url, and
+# combined_features (genres + cast + director + overview, the embedding input)
+# would repeat the other fields in every row.
+# The schema is maintained offline by migrate_db.py; an unmigrated file gets
+# poster_url derived by SQLite instead.
+CATALOG_COLUMNS = 'id, title, overview, genres, "cast", director, vote_average, release_date, poster_url'
+LEGACY_CATALOG_COLUMNS = CATALOG_COLUMNS.replace("poster_url", f"{POSTER_URL_SQL} AS poster_url")
+# Catalog size is MOVIES_DF.height, so /movies never runs COUNT(*). The frame (and
+# with it the count) is rebuilt when movies.db or its WAL is written to, e.g. by ingestion.
+MOVIES_DF_STAMP: Optional[tuple] = None
+# id -> row position in MOVIES_DF, so a keyset cursor resolves without scanning
+MOVIES_ROW_POS: Dict[str, int] = {}
+# id -> title for /recommend's liked movies; built with the catalog, so no SQLite per request
+MOVIES_TITLES: Dict[str, str] = {}
+MOVIES_DF_RELOAD_LOCK = asyncio.Lock()
+
+def catalog_stamp() -> tuple:
+    stamp = []
+    for path in (DB_PATH, f"{DB_PATH}-wal"):
+        try:
+            stamp.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamp.append(0)
+    return tuple(stamp)
+
+def load_movies_frame() -> pl.DataFrame:
+    global MOVIES_DF, MOVIES_DF_STAMP, MOVIES_ROW_POS, MOVIES_TITLES
+    # Stamped before reading so a write that lands mid-load triggers another reload
+    stamp = catalog_stamp()
+    with closing(connect_db()) as conn:
+        has_poster_url = conn.execute(POSTER_URL_COLUMN_EXISTS_SQL).fetchone() is not None
+        columns = CATALOG_COLUMNS if has_poster_url else LEGACY_CATALOG_COLUMNS
+        df = pl.read_database(f"SELECT {columns} FROM movies ORDER BY vote_average DESC, id DESC", conn)
+    # Rows are stored in response shape: score is added next to vote_average
+    MOVIES_DF = df.with_columns(score=pl.col("vote_average"))
+    ids = MOVIES_DF["id"].to_list()
+    MOVIES_ROW_POS = {movie_id: pos for pos, movie_id in enumerate(ids)}
+    MOVIES_TITLES = dict(zip(ids, MOVIES_DF["title"].to_list()))
+    MOVIES_DF_STAMP = stamp
+    logger.info(f"Loaded {MOVIES_DF.height} movies into the homepage catalog.")
+    return MOVIES_DF
+
+async def get_movies_frame() -> pl.DataFrame:
+    """The preloaded catalog, (re)loaded here if startup could not or movies.db has changed."""
+    if MOVIES_DF is None or MOVIES_DF_STAMP != catalog_stamp():
+        async with MOVIES_DF_RELOAD_LOCK:
+            if MOVIES_DF is None or MOVIES_DF_STAMP != catalog_stamp():
+                await asyncio.to_thread(load_movies_frame)
+    return MOVIES_DF
+
+def seek_offset(movies_df: pl.DataFrame, after_score: float, after_id: str) -> int:
+    """Position of the first row sorting after the (vote_average, id) cursor."""
+    pos = MOVIES_ROW_POS.get(after_id)
+    if pos is not None and movies_df["vote_average"][pos] == after_score:
+        return pos + 1
+    # Cursor row was removed or re-scored since: count the prefix sorting at or before it
+    return movies_df.select(
+        ((pl.col("vote_average") > after_score)
+         | ((pl.col("vote_average") == after_score) & (pl.col("id") >= after_id))).sum()
+    ).item()
+
+def page_offset(movies_df: pl.DataFrame, page: int, limit: int, cursor: Optional[str]) -> int:
+    if cursor:
+        return seek_offset(movies_df, *decode_cursor(cursor))
+    return (page - 1) * limit
+
+def next_page_cursor(movies_df: pl.DataFrame, end: int) -> Optional[str]:
+    """Cursor for the row at end - 1, or None when the page reaches the end of the catalog."""
+    if end >= movies_df.height:
+        return None
+    return encode_cursor(movies_df["vote_average"][end - 1], movies_df["id"][end - 1])
+
 # --- HELPER FUNCTIONS ---
-def get_titles_from_ids(movie_ids: List[str]):
-    """Fetches movie titles from SQLite for the selected IDs."""
+async def get_titles_from_ids(movie_ids: List[str]):
+    """Resolves the selected IDs to titles from the catalog, falling back to SQLite."""
     if not movie_ids or not os.path.exists(DB_PATH):
         return []
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            placeholders = ', '.join('?' for _ in movie_ids)
-            query = f"SELECT title FROM movies WHERE id IN ({placeholders})"
-            cursor = conn.execute(query, movie_ids)
-            return [row[0] for row in cursor.fetchall()]
+        await get_movies_frame()
+        return [MOVIES_TITLES[mid] for mid in dict.fromkeys(movie_ids) if mid in MOVIES_TITLES]
+    except Exception as e:
+        logger.warning(f"Catalog unavailable for title lookup, querying SQLite: {e}")
+    try:
+        async with db_connection() as db, db.execute(TITLES_BY_IDS_SQL, (orjson.dumps(movie_ids).decode(),)) as cursor:
+            return [row[0] for row in await cursor.fetchall()]
     except Exception as e:
         logger.error(f"SQLite Error: {e}")
         return []
 
-async def fetch_omdb_metadata(client: httpx.AsyncClient, title: str) -> dict:
+# --- OMDB METADATA CACHE ---
+# Posters/ratings change slowly, so hits live for a day. Misses (titles OMDB
+# answers "Response": "False" for) are remembered for an hour so they are not
+# retried on every request; failed requests are not cached at all.
+OMDB_CACHE_TTL_SECONDS = 86400
+# HTTPS directly: the plain-http endpoint costs an extra redirect hop, and TLS is
+# paid once per pooled keep-alive connection.
+OMDB_URL = "https://www.omdbapi.com/"
+# At most this many OMDB requests in flight process-wide, so one /recommend's
+# fan-out cannot monopolise the pool while OMDB is slow.
+OMDB_SEMAPHORE = asyncio.Semaphore(8)
+# Time /recommend waits for its picks' OMDB data once Gemini has answered
+OMDB_ENRICH_DEADLINE_SECONDS = 2.0
+OMDB_CACHE = QueryCache(max_size=50_000, ttl_seconds=OMDB_CACHE_TTL_SECONDS)
+OMDB_MISS_CACHE = QueryCache(max_size=10_000, ttl_seconds=3600)
+OMDB_CACHE_STATS = {"disk_hits": 0, "coalesced": 0, "deadline_skips": 0}
+# Lookups currently being fetched, so concurrent requests for one title (duplicate
+# picks within a /recommend, or overlapping requests) share a single fetch.
+OMDB_INFLIGHT: Dict[str, asyncio.Future] = {}
+
+def omdb_cache_key(title: str) -> str:
+    return title.strip().casefold()
+
+# Successful lookups are also written through to a small SQLite file (kept out
+# of movies.db) so a restart does not re-fetch every poster from OMDB. A title's
+# year/poster/rating practically never change, so disk entries live for 30 days.
+OMDB_PERSIST_TTL_SECONDS = 30 * 86400
+OMDB_CACHE_DB_PATH = os.getenv("OMDB_CACHE_PATH", os.path.join(os.path.dirname(__file__), "omdb_cache.db"))
+
+def connect_omdb_cache_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(OMDB_CACHE_DB_PATH, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS omdb_cache(title TEXT PRIMARY KEY, data BLOB, ts INTEGER)")
+    return conn
+
+# The cache file is owned by one dedicated thread; reads/writes are queued to it
+OMDB_DB_WORKER = DBWorker(connect_omdb_cache_db, name="omdb-cache-db")
+
+def _select_omdb(conn: sqlite3.Connection, key: str):
+    return conn.execute(
+        "SELECT data FROM omdb_cache WHERE title = ? AND ts >= ?",
+        (key, int(time.time()) - OMDB_PERSIST_TTL_SECONDS)
+    ).fetchone()
+
+def _upsert_omdb(conn: sqlite3.Connection, key: str, data: bytes):
+    conn.execute(
+        "INSERT OR REPLACE INTO omdb_cache(title, data, ts) VALUES (?, ?, ?)",
+        (key, data, int(time.time()))
+    )
+
+async def read_persisted_omdb(key: str) -> Optional[dict]:
+    try:
+        row = await OMDB_DB_WORKER.submit(_select_omdb, key)
+    except Exception as e:
+        logger.warning(f"OMDB cache read failed: {e}")
+        return None
+    return orjson.loads(row[0]) if row else None
+
+async def persist_omdb(key: str, metadata: dict):
+    try:
+        await OMDB_DB_WORKER.submit(_upsert_omdb, key, orjson.dumps(metadata))
+    except Exception as e:
+        logger.warning(f"OMDB cache write failed: {e}")
+
+def close_omdb_cache_db():
+    OMDB_DB_WORKER.close()
+
+async def fetch_omdb_metadata(title: str) -> dict:
     """Fetches the latest movie metadata (like high-res posters) from OMDB."""
-    if not OMDB_API_KEY:
+    # Blank titles can only come back "Movie not found"; one-letter titles ("M") are real
+    if not OMDB_API_KEY or not title or not title.strip():
         return {}
-    
+
+    key = omdb_cache_key(title)
+    cached = OMDB_CACHE.get(key)
+    if cached is not None:
+        return cached
+    if OMDB_MISS_CACHE.get(key):
+        return {}
+
+    pending = OMDB_INFLIGHT.get(key)
+    if pending is not None:
+        OMDB_CACHE_STATS["coalesced"] += 1
+    else:
+        pending = OMDB_INFLIGHT[key] = asyncio.ensure_future(_load_omdb_metadata(key, title))
+        pending.add_done_callback(lambda _: OMDB_INFLIGHT.pop(key, None))
+    # Shielded so one caller going away does not cancel the fetch for the others
+    return await asyncio.shield(pending)
+
+async def _load_omdb_metadata(key: str, title: str) -> dict:
+    persisted = await read_persisted_omdb(key)
+    if persisted is not None:
+        OMDB_CACHE_STATS["disk_hits"] += 1
+        OMDB_CACHE.put(key, persisted)
+        return persisted
+
+    async with OMDB_SEMAPHORE:
+        metadata = await _request_omdb_metadata(title)
+    if metadata is None:
+        # Timeout, transport error or bad status: the next lookup tries again
+        return {}
+    if metadata:
+        OMDB_CACHE.put(key, metadata)
+        await persist_omdb(key, metadata)
+    else:
+        OMDB_MISS_CACHE.put(key, True)
+    return metadata
+
+async def _request_omdb_metadata(title: str) -> Optional[dict]:
+    """The title's metadata, {} if OMDB does not know it, or None if the request failed."""
     try:
-        url = f"http://www.omdbapi.com/?t={title}&apikey={OMDB_API_KEY}"
-        response = await client.get(url, timeout=5.0)
+        # params= lets httpx escape titles containing '&', '#', spaces, etc.
+        response = await get_omdb_client().get(
+            OMDB_URL,
+            params={"t": title, "apikey": OMDB_API_KEY}
+        )
         if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if data.get("Response") == "True":
                     return {
                         "poster_url": data.get("Poster"),
                         "year": data.get("Year"),
                         "rating": data.get("imdbRating")
                     }
+                if data.get("Response") == "False":
+                    return {}
+        logger.warning(f"OMDB Error for '{title}': HTTP {response.status_code}")
     except Exception as e:
         logger.warning(f"OMDB Error for '{title}': {e}")
-    return {}
+    return None
+
+def task_result(task: asyncio.Task, default):
+    """The task's result if it finished cleanly, else `default`."""
+    if task.done() and not task.cancelled() and task.exception() is None:
+        return task.result()
+    return default
 
 # --- ENDPOINTS ---
 
@@ -103,141 +534,232 @@ async def fetch_omdb_metadata(client: httpx.AsyncClient, title: str) -> dict:
 def health_check():
     return {"status": "online", "mode": "Secure Production"}
 
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss/eviction counters for every in-process cache."""
+    return {
+        "embedding_cache": EMBED_CACHE.stats(),
+        "search_cache": {**SEARCH_CACHE.stats(), **SEARCH_CACHE_STATS},
+        "omdb_cache": {**OMDB_CACHE.stats(), **OMDB_CACHE_STATS},
+        "omdb_miss_cache": OMDB_MISS_CACHE.stats()
+    }
+
+@app.get("/metrics")
+def metrics():
+    return cache_stats()
+
 @app.get("/movies")
-async def get_movies(page: int = Query(1, ge=1), limit: int = Query(1000, ge=1, le=2000)):
-    """Reads directly from the movies.db file for the homepage."""
-    offset = (page - 1) * limit
+async def get_movies(
+    page: int = Query(1, ge=1),
+    limit: int = Query(1000, ge=1, le=2000),
+    cursor: Optional[str] = None,
+):
+    """Reads directly from the movies.db file for the homepage.
+
+    Pass the `next_cursor` from a previous response to continue right after
+    its last row; `page` is kept for existing clients.
+    """
     if not os.path.exists(DB_PATH):
         return {"data": [], "error": "Database file not found."}
 
     try:
-        # Use asyncio.to_thread for blocking DB call to avoid blocking the event loop
-        # Although sqlite3 is fast, for high concurrency or long queries it's better.
-        # But here valid for logic separation.
-        def read_db():
-            with sqlite3.connect(DB_PATH) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute("SELECT * FROM movies ORDER BY vote_average DESC LIMIT ? OFFSET ?", (limit, offset))
-                rows = cursor.fetchall()
-                total = conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
-                return rows, total
-        
-        rows, total = await asyncio.to_thread(read_db)
-        
-        # Map DB rows to response format directly
-        results = []
-        for row in rows:
-            m = secure_poster_url(dict(row))
-            if 'vote_average' in m:
-                m['score'] = m['vote_average']
-            results.append(m)
-
-        return {
-            "data": results,
-            "meta": {
-                "current_page": page,
-                "limit": limit,
-                "total_items": total,
-                "total_pages": (total + limit - 1) // limit
-            }
+        movies_df = await get_movies_frame()
+        total = movies_df.height
+        offset = page_offset(movies_df, page, limit, cursor)
+        next_cursor = next_page_cursor(movies_df, offset + limit)
+
+        meta = {
+            "current_page": page,
+            "limit": limit,
+            "total_items": total,
+            "total_pages": (total + limit - 1) // limit,
+            "next_cursor": next_cursor
         }
+        # Polars serializes the page straight from its columns: no per-row dicts
+        # and no jsonable_encoder pass over them.
+        data = movies_df.slice(offset, limit).write_json().encode()
+        return Response(content=b'{"data":' + data + b',"meta":' + orjson.dumps(meta) + b"}", media_type="application/json")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"DB Error: {e}")
-        # traceback.print_exc() # detailed logs if needed
         raise HTTPException(status_code=500, detail="Database Read Error")
 
-@app.post("/recommend")
-async def recommend_movies(req: RecommendationRequest):
+# Rows serialized per chunk while streaming, bounding the encoded buffer for large pages
+MOVIES_STREAM_CHUNK_ROWS = 200
+
+async def ndjson_rows(page_df: pl.DataFrame):
+    for start in range(0, page_df.height, MOVIES_STREAM_CHUNK_ROWS):
+        yield page_df.slice(start, MOVIES_STREAM_CHUNK_ROWS).write_ndjson().encode()
+
+@app.get("/movies/stream")
+async def stream_movies(
+    page: int = Query(1, ge=1),
+    limit: int = Query(1000, ge=1, le=2000),
+    cursor: Optional[str] = None,
+):
+    """NDJSON twin of /movies: one movie per line, total in the X-Total-Count
+    header and the following page's cursor, if any, in X-Next-Cursor."""
+    if not os.path.exists(DB_PATH):
+        raise HTTPException(status_code=503, detail="Database file not found.")
+
     try:
-        # 1. SETUP
-        selected_titles = get_titles_from_ids(req.selected_movie_ids)
-        augmented_query = f"Movies similar to {', '.join(selected_titles)}. Context: {req.query}" if selected_titles else req.query
+        movies_df = await get_movies_frame()
+        offset = page_offset(movies_df, page, limit, cursor)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"DB Error: {e}")
+        raise HTTPException(status_code=500, detail="Database Read Error")
 
-        logger.debug(f"Embedding Query with 004 -> {augmented_query[:50]}...")
+    headers = {"X-Total-Count": str(movies_df.height)}
+    next_cursor = next_page_cursor(movies_df, offset + limit)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return StreamingResponse(
+        ndjson_rows(movies_df.slice(offset, limit)),
+        media_type="application/x-ndjson",
+        headers=headers
+    )
 
-        # 2. EMBED (STRICTLY MODEL 004)
-        try:
-            emb_response = genai.embed_content(
-                model="models/text-embedding-004", # Correct Model
-                content=augmented_query,
-                task_type="retrieval_query"
-            )
-            query_vec = emb_response['embedding']
-        except Exception as embed_err:
-            return {"error": f"GOOGLE EMBEDDING FAILED: {str(embed_err)}", "movies": []}
+@app.get("/movies/{movie_id}/enrich")
+async def enrich_movie(movie_id: str):
+    """OMDB metadata for a single movie; the frontend calls this only for items on screen."""
+    if not os.path.exists(DB_PATH):
+        raise HTTPException(status_code=503, detail="Database file not found.")
+
+    try:
+        async with db_connection() as db, db.execute("SELECT title FROM movies WHERE id = ?", (movie_id,)) as cursor:
+            row = await cursor.fetchone()
+        title = row[0] if row else None
+    except Exception as e:
+        logger.error(f"DB Error: {e}")
+        raise HTTPException(status_code=500, detail="Database Read Error")
+    if title is None:
+        raise HTTPException(status_code=404, detail="Movie not found")
+
+    omdb_data = await fetch_omdb_metadata(title)
+    return {"id": movie_id, "title": title, **omdb_data}
+
+def candidate_card(match) -> dict:
+    """Catalog-only view of a Pinecone match, sent before Gemini and OMDB have answered."""
+    m = match['metadata']
+    return {
+        "id": match['id'],
+        "title": m.get('title'),
+        "overview": m.get('overview'),
+        "poster_url": secure_poster_url({"poster_path": m.get('poster_path')}).get("poster_url"),
+        "score": match['score']
+    }
+
+async def recommendation_events(req: RecommendationRequest):
+    """Runs the /recommend pipeline, yielding progress events as each stage completes.
+
+    Phases: "candidates" (after Pinecone), "reasoning" (after Gemini) and a
+    closing "final" or "error" event whose body is the classic response.
+    """
+    omdb_prefetch = {}
+    try:
+        # 1. SETUP (aiosqlite keeps the SQLite read off the event loop).
+        # Titles are only awaited where they are needed, so on an embedding cache hit
+        # the lookup overlaps with the Pinecone search.
+        titles_task = asyncio.create_task(get_titles_from_ids(req.selected_movie_ids))
+
+        # 2. EMBED (STRICTLY MODEL 004), served from the TTL cache on repeat queries
+        cache_key = embedding_cache_key(req.query, req.selected_movie_ids)
+        cached_vec = EMBED_CACHE.get(cache_key)
+        if cached_vec is not None:
+            query_vec = list(cached_vec)
+        else:
+            selected_titles = await titles_task
+            augmented_query = f"Movies similar to {', '.join(selected_titles)}. Context: {req.query}" if selected_titles else req.query
+            logger.debug(f"Embedding Query with 004 -> {augmented_query[:50]}...")
+            try:
+                query_vec = await embed_batcher.submit(augmented_query)
+            except Exception as embed_err:
+                yield {"phase": "error", "error": f"GOOGLE EMBEDDING FAILED: {str(embed_err)}", "movies": []}
+                return
+            EMBED_CACHE.put(cache_key, array('f', query_vec))
         
-        # 3. SEARCH PINECONE
-        try:
-            results = index.query(
-                vector=query_vec, 
-                top_k=50, # Higher fetch to allow filtering
-                include_metadata=True
-            )
-        except Exception as pinecone_err:
-             return {"error": f"PINECONE SEARCH FAILED: {str(pinecone_err)}", "movies": []}
+        # 3. SEARCH PINECONE (skipped when a nearby vector was searched recently)
+        top_k = 50 # Higher fetch to allow filtering
+        search_key = search_cache_key(query_vec, top_k)
+        results = SEARCH_CACHE.get(search_key)
+        if results is None:
+            neighbour_key = nearest_recent_search(query_vec)
+            if neighbour_key is not None:
+                results = SEARCH_CACHE.get(neighbour_key)
+                if results is not None:
+                    SEARCH_CACHE_STATS["near_hits"] += 1
+        if results is None:
+            try:
+                results = await pinecone_batcher.submit(query_vec, top_k, key=search_key)
+            except Exception as pinecone_err:
+                yield {"phase": "error", "error": f"PINECONE SEARCH FAILED: {str(pinecone_err)}", "movies": []}
+                return
+            SEARCH_CACHE.put(search_key, results)
+            remember_search(query_vec, search_key)
 
         # 4. CHECK RESULTS
         if not results['matches']:
-             return {"ai_reasoning": "I couldn't find any matches in the database. Try a broader search.", "movies": []}
+            yield {"phase": "final", "ai_reasoning": "I couldn't find any matches in the database. Try a broader search.", "movies": []}
+            return
 
         # 5. PREPARE AI CONTEXT (TOP 20 for AI to pick from, excluding selected)
-        context_text = ""
-        
         # Filter out movies the user already selected AND duplicates from Pinecone
+        selected_titles = await titles_task
         input_ids = set(req.selected_movie_ids)
         input_titles = set(t.lower() for t in selected_titles)
-        seen_ids = set()
         seen_titles = set()
+        by_id = {}
         candidates = []
-        
+        context_parts = []
+
+        # One pass indexes every match by id and collects the Top 20 candidates with their prompt lines
         for m in results['matches']:
             mid = m['id']
-            m_meta = m.get('metadata', {})
-            m_title = m_meta.get('title', '').strip()
+            if mid in by_id:
+                continue
+            by_id[mid] = m
+            if len(candidates) == 20:
+                continue
+
+            m_meta = m.get('metadata') or {}
+            m_title = (m_meta.get('title') or '').strip()
             m_title_lower = m_title.lower()
 
             if (mid not in input_ids and 
-                mid not in seen_ids and 
                 m_title_lower not in input_titles and 
                 m_title_lower not in seen_titles):
                 
                 candidates.append(m)
-                seen_ids.add(mid)
                 seen_titles.add(m_title_lower)
-        
-        # Take Top 20 from refined list
-        candidates = candidates[:20]
-        
-        for match in candidates:
-            m = match['metadata']
-            context_text += f"ID: {match['id']} | Title: {m.get('title')} | Overview: {m.get('overview')}\n"
+                context_parts.append(f"- {mid}: {m_meta.get('title')} — {prompt_overview(m_meta.get('overview'))}")
+
+        # Start OMDB lookups for every candidate now so they overlap with Gemini;
+        # lookups for titles it does not pick still warm the OMDB cache.
+        omdb_prefetch = {
+            m['id']: asyncio.create_task(fetch_omdb_metadata((m.get('metadata') or {}).get('title')))
+            for m in candidates
+        }
+
+        yield {"phase": "candidates", "movies": [candidate_card(m) for m in candidates]}
+        context_text = "\n".join(context_parts)
 
         # 6. ASK GEMINI (RAG)
-        prompt = f"""
-        User Query: "{req.query}"
-        User Likes: {", ".join(selected_titles)}
-        
-        Candidates:
-        {context_text}
-        
-        Task:
-        1. Select the Top 15 movies that best match the user's query and taste.
-        2. Provide a specific, unique reason for why THIS user would like EACH movie. Do not use generic descriptions like "A great movie". Use the context of the user's query and likes.
-        
-        Return JSON:
-        {{
-            "movie_ids": ["id1", "id2", ...],
-            "reasoning": {{
-                "id1": "Custom reason 1...",
-                "id2": "Custom reason 2..."
-            }}
-        }}
-        """
+        prompt = PROMPT_TEMPLATE.format_map({
+            "query": req.query,
+            "likes": ", ".join(selected_titles),
+            "candidates": context_text
+        })
         
         try:
-            response = chat_model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-            import json
-            ai_data = json.loads(response.text)
+            response = await asyncio.to_thread(
+                chat_model.generate_content,
+                prompt,
+                generation_config=GEMINI_GENERATION_CONFIG
+            )
+            ai_data = parse_ai_json(response.text)
         except Exception as ai_err:
              logger.error(f"AI Generation Error: {ai_err}")
              ai_data = {
@@ -251,15 +773,17 @@ async def recommend_movies(req: RecommendationRequest):
         if not target_ids: target_ids = [m['id'] for m in candidates[:10]]
         
         ai_reasonings = ai_data.get("reasoning", {})
+
+        # Resolve the AI's picks through the id index, in the AI's order; the
+        # reasoning event lists exactly the movies the final event will carry
+        selected_matches = [by_id[mid] for mid in dict.fromkeys(map(str, target_ids)) if mid in by_id]
+        yield {"phase": "reasoning", "ai_reasoning": ai_reasonings, "movie_ids": [m['id'] for m in selected_matches]}
         
-        # Async enrichment for recommendations
-        async def process_recommendation(client, match):
+        # Enrichment for recommendations
+        def process_recommendation(match, omdb_data):
             m = match['metadata']
             title = m.get('title')
             
-            # Enrich with OMDB metadata
-            omdb_data = await fetch_omdb_metadata(client, title)
-            
             # Update poster logic with OMDB fallback
             movie_dict = {
                 "poster_path": omdb_data.get("poster_url") or m.get('poster_path')
@@ -284,18 +808,53 @@ async def recommend_movies(req: RecommendationRequest):
                 "reasoning": reasoning
             }
 
-        # We need to filter results based on target_ids first
-        selected_matches = [m for m in results['matches'] if m['id'] in target_ids]
-        
-        # Execute concurrently
-        async with httpx.AsyncClient() as client:
-            final_movies = await asyncio.gather(*(process_recommendation(client, m) for m in selected_matches))
+        # OMDB lookups (prefetched unless the AI went outside the candidates) share one
+        # deadline; picks still waiting on OMDB when it passes go out without OMDB fields.
+        omdb_tasks = {}
+        for match in selected_matches:
+            task = omdb_prefetch.get(match['id'])
+            if task is None:
+                task = omdb_prefetch[match['id']] = asyncio.create_task(fetch_omdb_metadata(match['metadata'].get('title')))
+            omdb_tasks[match['id']] = task
+        if omdb_tasks:
+            _, pending = await asyncio.wait(omdb_tasks.values(), timeout=OMDB_ENRICH_DEADLINE_SECONDS)
+            if pending:
+                OMDB_CACHE_STATS["deadline_skips"] += len(pending)
+                logger.warning(f"OMDB enrichment deadline hit, {len(pending)}/{len(omdb_tasks)} picks sent without it")
+
+        final_movies = [process_recommendation(m, task_result(omdb_tasks[m['id']], {})) for m in selected_matches]
         
-        return {
+        yield {
+            "phase": "final",
             "ai_reasoning": "Here are my top selections for you.", # Global context
             "movies": final_movies
         }
 
     except Exception as e:
-        traceback.print_exc()
-        return {"error": f"SERVER ERROR: {str(e)}", "movies": []}
+        logger.exception("recommend_failed")
+        yield {"phase": "error", "error": f"SERVER ERROR: {str(e)}", "movies": []}
+    finally:
+        # Only drops our waiters; the shared OMDB fetches themselves run to completion
+        for task in omdb_prefetch.values():
+            task.cancel()
+
+async def ndjson_stream(events):
+    async with aclosing(events):
+        async for event in events:
+            yield orjson.dumps(event) + b"\n"
+
+@app.post("/recommend")
+async def recommend_movies(req: RecommendationRequest, stream: bool = False):
+    """Recommends movies for a query plus liked titles.
+
+    With `?stream=true` the response is NDJSON: catalog cards arrive as soon as
+    Pinecone answers, followed by Gemini's picks and the enriched final list.
+    """
+    events = recommendation_events(req)
+    if stream:
+        return StreamingResponse(ndjson_stream(events), media_type="application/x-ndjson")
+
+    async with aclosing(events):
+        async for event in events:
+            if event["phase"] in ("final", "error"):
+                return {k: v for k, v in event.items() if k != "phase"}
@@ -0,0 +1,38 @@
+import sqlite3
+import os
+import sys
+from contextlib import closing
+
+sys.path.append(os.getcwd())
+
+from app.database import (
+    ADD_POSTER_URL_COLUMN_SQL, BACKFILL_POSTER_URL_SQL, MOVIES_VOTE_INDEX_SQL, POSTER_URL_COLUMN_EXISTS_SQL,
+)
+
+# Offline schema upkeep for the shipped catalog. Both APIs open movies.db read-only,
+# so run this once after changing the schema (or re-ingesting) and commit the file.
+# Safe to re-run: every step is a no-op on an already migrated file.
+#
+# The journal mode is left at DELETE on purpose: a WAL-mode file cannot be opened,
+# even with mode=ro, by a process that may not create the -shm file next to it.
+DB_PATH = "movies.db"
+
+def migrate(path):
+    with closing(sqlite3.connect(path, isolation_level=None)) as conn:
+        conn.execute(MOVIES_VOTE_INDEX_SQL)
+        print("✅ Sort index (vote_average DESC, id DESC) present.")
+
+        if conn.execute(POSTER_URL_COLUMN_EXISTS_SQL).fetchone() is None:
+            conn.execute(ADD_POSTER_URL_COLUMN_SQL)
+            print("✅ Added movies.poster_url.")
+        changed = conn.execute(BACKFILL_POSTER_URL_SQL).rowcount
+        print(f"✅ Backfilled poster_url for {changed} rows.")
+
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        print(f"✅ Journal mode: {mode}")
+
+if __name__ == "__main__":
+    if os.path.exists(DB_PATH):
+        migrate(DB_PATH)
+    else:
+        print(f"❌ {DB_PATH} not found.")
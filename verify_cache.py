@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from app.cache import QueryCache
+from verify_common import check, report
+
+def test_ttl():
+    print("Testing QueryCache TTL...")
+    cache = QueryCache(max_size=10, ttl_seconds=0.05)
+    cache.put("a", 1)
+    check(cache.get("a") == 1, "Fresh entry is returned")
+    time.sleep(0.1)
+    check(cache.get("a") is None, "Expired entry is a miss")
+    check(len(cache) == 0, "Expired entry is dropped on read")
+    check(cache.get("a", "fallback") == "fallback", "Miss returns the default")
+
+    cache.put("b", 2)
+    time.sleep(0.1)
+    cache.put("b", 3)
+    check(cache.get("b") == 3, "Re-putting a key renews its TTL")
+
+def test_lru_eviction():
+    print("Testing QueryCache LRU eviction...")
+    cache = QueryCache(max_size=3, ttl_seconds=60)
+    for key in ("a", "b", "c"):
+        cache.put(key, key.upper())
+    # Touch "a" so "b" becomes the least recently used
+    cache.get("a")
+    cache.put("d", "D")
+    check(len(cache) == 3, "Size stays at max_size")
+    check(cache.get("b") is None, "Least recently used entry was evicted")
+    check(all(cache.get(k) is not None for k in ("a", "c", "d")), "Recently used entries survive")
+
+    stats = cache.stats()
+    check(stats["evictions"] == 1, f"One eviction counted ({stats['evictions']})")
+    check(stats["hits"] == 4 and stats["misses"] == 1, f"Hits/misses counted ({stats['hits']}/{stats['misses']})")
+
+if __name__ == "__main__":
+    test_ttl()
+    test_lru_eviction()
+    report("cache")
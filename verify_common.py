@@ -0,0 +1,78 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# Shared by the verify_*.py scripts (not a check itself): each check prints one
+# ✅/❌ line, and report() prints the summary and exits non-zero on any failure.
+failures = 0
+
+def check(condition, message):
+    global failures
+    if condition:
+        print(f"✅ {message}")
+    else:
+        failures += 1
+        print(f"❌ {message}")
+
+def report(label):
+    if failures:
+        print(f"\n❌ {failures} check(s) failed.")
+        sys.exit(1)
+    print(f"\nAll {label} checks passed!")
+
+# --- Offline root service (main.py) ---
+
+def import_root_service():
+    """Imports main.py with an OMDB key (callers mock the transport) and a throwaway
+    persistent OMDB cache, so no check touches the network or omdb_cache.db."""
+    cache_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, cache_dir, True)
+    os.environ["OMDB_CACHE_PATH"] = os.path.join(cache_dir, "omdb_cache.db")
+    os.environ["OMDB_API_KEY"] = "verify"
+    import main
+    return main
+
+def mock_omdb(main, handler):
+    """Routes main's OMDB traffic to `handler(request) -> httpx.Response` (sync or async)."""
+    import httpx
+    main.OMDB_CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+def fake_matches(count):
+    """Pinecone-shaped matches m0..m{count-1}, titled "Movie <i>", best first."""
+    return [
+        {"id": f"m{i}", "score": 1 - i / 100,
+         "metadata": {"title": f"Movie {i}", "overview": f"Overview {i}", "poster_path": f"/p{i}.jpg"}}
+        for i in range(count)
+    ]
+
+class FakeIndex:
+    def __init__(self, matches):
+        self.matches = matches
+        self.calls = 0
+
+    def query(self, vector, top_k, include_metadata=True, **kwargs):
+        self.calls += 1
+        return {"matches": self.matches[:top_k]}
+
+class FakeReply:
+    def __init__(self, text):
+        self.text = text
+
+class FakeChatModel:
+    def __init__(self, reply: dict):
+        self.reply = reply
+
+    def generate_content(self, prompt, **kwargs):
+        import orjson
+        return FakeReply(orjson.dumps(self.reply).decode())
+
+def install_fake_ai(main, matches, ai_reply: dict):
+    """Points main's embedding, Pinecone and Gemini calls at in-process fakes."""
+    import google.generativeai as genai
+    genai.embed_content = lambda model, content, task_type: {"embedding": [[0.1] * 768 for _ in content]}
+    main.index = main.pinecone_batcher.index = FakeIndex(matches)
+    main.chat_model = FakeChatModel(ai_reply)
+    main.EMBED_CACHE.clear()
+    main.SEARCH_CACHE.clear()
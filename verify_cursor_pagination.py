@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import sqlite3
+
+# Ensure app can be imported
+sys.path.append(os.getcwd())
+
+from starlette.testclient import TestClient
+
+from verify_common import check, report
+
+DB_PATH = "movies.db"
+
+def expected_order():
+    # The catalog order every walk must reproduce: vote_average DESC, id DESC
+    with sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True) as conn:
+        return [row[0] for row in conn.execute("SELECT id FROM movies ORDER BY vote_average DESC, id DESC")]
+
+def walk_movies(client, limit):
+    """Follows meta.next_cursor from page 1 to the end; returns every id seen."""
+    ids, params = [], {"limit": limit}
+    for _ in range(10000):
+        response = client.get("/movies", params=params)
+        if response.status_code != 200:
+            print(f"❌ /movies returned {response.status_code}: {response.text[:200]}")
+            return ids
+        body = response.json()
+        ids += [m["id"] for m in body["data"]]
+        next_cursor = body["meta"]["next_cursor"]
+        if not next_cursor:
+            return ids
+        params = {"limit": limit, "cursor": next_cursor}
+    return ids
+
+def check_walk(label, client, limit, expected):
+    ids = walk_movies(client, limit)
+    check(len(ids) == len(set(ids)), f"{label}: no duplicates across {len(ids)} rows (limit={limit})")
+    check(ids == expected, f"{label}: cursor walk matches the full catalog order")
+
+def test_app_package(expected):
+    print("\n--- app package (app.main) ---")
+    from app.main import app
+    with TestClient(app) as client:
+        check_walk("app /movies", client, 100, expected)
+        check_walk("app /movies", client, 37, expected)
+        check(client.get("/movies", params={"cursor": "not-a-cursor"}).status_code == 400, "app: malformed cursor is a 400")
+
+def test_root_service(expected):
+    print("\n--- root service (main.py) ---")
+    from main import app
+    with TestClient(app) as client:
+        check_walk("main /movies", client, 250, expected)
+        check(client.get("/movies", params={"cursor": "not-a-cursor"}).status_code == 400, "main: malformed cursor is a 400")
+
+        # NDJSON twin: one JSON object per line, next cursor in X-Next-Cursor
+        ids, params, content_types = [], {"limit": 300}, set()
+        for _ in range(10000):
+            response = client.get("/movies/stream", params=params)
+            content_types.add(response.headers["content-type"])
+            ids += [json.loads(line)["id"] for line in response.text.splitlines() if line]
+            total = int(response.headers["x-total-count"])
+            next_cursor = response.headers.get("x-next-cursor")
+            if not next_cursor:
+                break
+            params = {"limit": 300, "cursor": next_cursor}
+        check(content_types == {"application/x-ndjson"}, "main /movies/stream: every page is application/x-ndjson")
+        check(total == len(expected), f"main /movies/stream: X-Total-Count is {total}")
+        check(len(ids) == len(set(ids)) and ids == expected, f"main /movies/stream: walk returned all {len(ids)} rows once, in order")
+
+if __name__ == "__main__":
+    if not os.path.exists(DB_PATH):
+        print("❌ DB not found")
+        sys.exit(1)
+    expected = expected_order()
+    test_app_package(expected)
+    test_root_service(expected)
+    report("pagination")
@@ -0,0 +1,69 @@
+import os
+import sys
+import asyncio
+import sqlite3
+import threading
+
+sys.path.append(os.getcwd())
+
+from app.db_worker import DBWorker
+from verify_common import check, report
+
+connections = []
+
+def connect():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE kv(k TEXT PRIMARY KEY, v TEXT)")
+    connections.append(conn)
+    return conn
+
+def put(conn, k, v):
+    conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?)", (k, v))
+    return threading.current_thread().name
+
+def get(conn, k):
+    row = conn.execute("SELECT v FROM kv WHERE k = ?", (k,)).fetchone()
+    return row[0] if row else None
+
+def fail(conn):
+    raise ValueError("job failed")
+
+async def test_db_worker():
+    print("Testing DBWorker...")
+    worker = DBWorker(connect, name="verify-db-worker")
+
+    thread_names = await asyncio.gather(*(worker.submit(put, f"k{i}", f"v{i}") for i in range(10)))
+    check(set(thread_names) == {"verify-db-worker"}, "Every job ran on the worker's own thread")
+    check(await worker.submit(get, "k7") == "v7", "Jobs see earlier writes (one ordered connection)")
+    check(len(connections) == 1, "The connection was opened once")
+
+    try:
+        await worker.submit(fail)
+        check(False, "A failing job raises in its caller")
+    except ValueError:
+        check(True, "A failing job raises in its caller")
+    check(await worker.submit(get, "k0") == "v0", "The worker keeps serving after a failed job")
+
+    # Queue a job without awaiting it, then shut down: close() drains it first
+    pending = asyncio.ensure_future(worker.submit(put, "late", "job"))
+    await asyncio.sleep(0)
+    thread = worker._thread
+    await asyncio.to_thread(worker.close)
+    check(not thread.is_alive(), "close() stopped the worker thread")
+    check(await pending == "verify-db-worker", "Jobs queued before close() still completed")
+    try:
+        connections[0].execute("SELECT 1")
+        check(False, "close() closed the connection")
+    except sqlite3.ProgrammingError:
+        check(True, "close() closed the connection")
+
+    worker.close()
+    check(True, "A second close() is a no-op")
+
+    # Submitting after close starts a fresh thread and connection
+    check(await worker.submit(get, "k0") is None, "A submit after close() reopens on a new connection")
+    await asyncio.to_thread(worker.close)
+
+if __name__ == "__main__":
+    asyncio.run(test_db_worker())
+    report("DB worker")
@@ -0,0 +1,61 @@
+import os
+import sys
+import asyncio
+
+sys.path.append(os.getcwd())
+
+import google.generativeai as genai
+from google.api_core.exceptions import InvalidArgument, ResourceExhausted
+from app.embed_batcher import EmbedBatcher
+from verify_common import check, report
+
+# Fake embed_content: no network, every call recorded
+embed_calls = []
+
+def fake_embed_content(model, content, task_type):
+    embed_calls.append(list(content))
+    if "bad input" in content:
+        raise InvalidArgument("bad input")
+    if "rate limited" in content:
+        raise ResourceExhausted("quota exceeded")
+    if "short reply" in content and len(content) > 1:
+        # A response with one vector missing
+        return {"embedding": [[0.0] for _ in content[1:]]}
+    return {"embedding": [[float(len(text))] for text in content]}
+
+async def test_embed_batcher():
+    print("Testing EmbedBatcher...")
+    genai.embed_content = fake_embed_content
+    batcher = EmbedBatcher(max_batch=8, max_wait_ms=20)
+
+    embed_calls.clear()
+    texts = ["a", "bb", "ccc", "dddd"]
+    vectors = await asyncio.gather(*(batcher.submit(t) for t in texts))
+    check(len(embed_calls) == 1, f"4 concurrent queries coalesced into {len(embed_calls)} call")
+    check(vectors == [[1.0], [2.0], [3.0], [4.0]], "Each caller got its own vector, in order")
+
+    embed_calls.clear()
+    results = await asyncio.gather(*(batcher.submit(t) for t in ["a", "bad input", "ccc"]), return_exceptions=True)
+    check(isinstance(results[1], InvalidArgument), "The bad input fails its own caller")
+    check(results[0] == [1.0] and results[2] == [3.0], "Its neighbours still get vectors (retried one by one)")
+
+    embed_calls.clear()
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(t) for t in ["a", "short reply"]), return_exceptions=True), 5
+    )
+    check(all(not isinstance(r, Exception) for r in results), "A short response does not strand any caller")
+
+    embed_calls.clear()
+    results = await asyncio.gather(*(batcher.submit(t) for t in ["a", "rate limited", "ccc"]), return_exceptions=True)
+    check(all(isinstance(r, ResourceExhausted) for r in results), "A quota error fails every caller in the batch")
+    check(len(embed_calls) == 1, f"...without per-query retries ({len(embed_calls)} call)")
+
+    embed_calls.clear()
+    results = await asyncio.gather(batcher.submit("bad input"), return_exceptions=True)
+    check(isinstance(results[0], InvalidArgument), "A lone failing query gets the error")
+
+    await batcher.stop()
+
+if __name__ == "__main__":
+    asyncio.run(test_embed_batcher())
+    report("embed batcher")
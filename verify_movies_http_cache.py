@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from starlette.testclient import TestClient
+
+import app.routers.movies as movies_router
+from app.main import app
+from verify_common import check, report
+
+DB_PATH = "movies.db"
+
+async def failing_columns(conn):
+    raise RuntimeError("simulated DB failure")
+
+def test_etag_and_304(client):
+    print("Testing /movies ETag and 304...")
+    first = client.get("/movies", params={"limit": 5})
+    etag = first.headers.get("etag")
+    check(first.status_code == 200 and etag, f"Page carries an ETag ({etag})")
+    check(first.headers.get("cache-control", "").startswith("public"), "Page is publicly cacheable")
+
+    repeat = client.get("/movies", params={"limit": 5}, headers={"If-None-Match": etag})
+    check(repeat.status_code == 304 and not repeat.content, "Matching If-None-Match gets an empty 304")
+    check(repeat.headers.get("etag") == etag, "The 304 repeats the ETag")
+
+    other = client.get("/movies", params={"limit": 5, "page": 2}, headers={"If-None-Match": etag})
+    check(other.status_code == 200 and other.headers.get("etag") != etag, "Another page has its own ETag")
+
+    cursor = first.json()["meta"]["next_cursor"]
+    by_cursor = client.get("/movies", params={"limit": 5, "cursor": cursor})
+    check(by_cursor.headers.get("etag") not in (None, etag), "A cursor page has its own ETag")
+
+def test_failed_read_is_not_cached(client):
+    print("Testing a failed /movies read...")
+    original = movies_router.get_movie_list_columns
+    movies_router.get_movie_list_columns = failing_columns
+    try:
+        failed = client.get("/movies", params={"limit": 5, "page": 3})
+    finally:
+        movies_router.get_movie_list_columns = original
+    check(failed.status_code == 500, f"A DB failure is a 500, not a short 200 page ({failed.status_code})")
+    check("etag" not in failed.headers, "The failure carries no ETag")
+    check(failed.headers.get("cache-control") == "no-store", "The failure is marked no-store")
+
+    recovered = client.get("/movies", params={"limit": 5, "page": 3})
+    check(recovered.status_code == 200 and len(recovered.json()["data"]) == 5, "The next request serves the full page")
+
+if __name__ == "__main__":
+    if not os.path.exists(DB_PATH):
+        print("❌ DB not found")
+        sys.exit(1)
+    with TestClient(app) as client:
+        test_etag_and_304(client)
+        test_failed_read_is_not_cached(client)
+    report("/movies HTTP cache")
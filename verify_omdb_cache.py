@@ -0,0 +1,55 @@
+import os
+import sys
+import asyncio
+
+sys.path.append(os.getcwd())
+
+import httpx
+from verify_common import check, report, import_root_service, mock_omdb
+
+main = import_root_service()
+
+omdb_calls = []
+
+def fake_omdb(request: httpx.Request) -> httpx.Response:
+    title = request.url.params["t"]
+    omdb_calls.append(title)
+    if title == "Flaky" and omdb_calls.count(title) == 1:
+        raise httpx.ConnectTimeout("simulated connect timeout")
+    if title == "Down":
+        return httpx.Response(503, text="Service Unavailable")
+    if title == "Unknown":
+        return httpx.Response(200, json={"Response": "False", "Error": "Movie not found!"})
+    return httpx.Response(200, json={"Response": "True", "Poster": f"https://posters/{title}.jpg", "Year": "1999", "imdbRating": "8.0"})
+
+async def lookup_twice(title):
+    omdb_calls.clear()
+    first = await main.fetch_omdb_metadata(title)
+    second = await main.fetch_omdb_metadata(title)
+    return first, second, len(omdb_calls)
+
+async def test_omdb_cache():
+    print("Testing the OMDB metadata cache...")
+    mock_omdb(main, fake_omdb)
+
+    first, second, calls = await lookup_twice("Known")
+    check(first.get("year") == "1999" and second == first, "A found title returns its metadata")
+    check(calls == 1, f"...and is served from cache on repeat ({calls} HTTP call)")
+
+    first, second, calls = await lookup_twice("Unknown")
+    check(first == {} and second == {}, "An unknown title returns {}")
+    check(calls == 1, f"...and the miss is cached ({calls} HTTP call)")
+
+    first, second, calls = await lookup_twice("Flaky")
+    check(first == {}, "A connect timeout returns {}")
+    check(calls == 2 and second.get("year") == "1999", f"...but is not cached: the next lookup retries and succeeds ({calls} calls)")
+
+    first, second, calls = await lookup_twice("Down")
+    check(first == {} and calls == 2, f"An HTTP 503 is not cached either ({calls} calls)")
+
+    await main.OMDB_CLIENT.aclose()
+    await asyncio.to_thread(main.close_omdb_cache_db)
+
+if __name__ == "__main__":
+    asyncio.run(test_omdb_cache())
+    report("OMDB cache")
@@ -0,0 +1,58 @@
+import os
+import sys
+import asyncio
+from collections import Counter
+
+sys.path.append(os.getcwd())
+
+import httpx
+from verify_common import check, report, import_root_service, mock_omdb, fake_matches, install_fake_ai
+
+main = import_root_service()
+
+omdb_calls = Counter()
+
+async def slow_omdb(request: httpx.Request) -> httpx.Response:
+    title = request.url.params["t"]
+    omdb_calls[title] += 1
+    await asyncio.sleep(0.05)
+    return httpx.Response(200, json={"Response": "True", "Poster": f"https://posters/{title}.jpg", "Year": "2001", "imdbRating": "7.5"})
+
+async def test_concurrent_lookups():
+    print("Testing concurrent OMDB lookups...")
+    coalesced_before = main.OMDB_CACHE_STATS["coalesced"]
+    results = await asyncio.gather(*(main.fetch_omdb_metadata("Shared Title") for _ in range(5)))
+    check(omdb_calls["Shared Title"] == 1, f"5 concurrent lookups of one title made {omdb_calls['Shared Title']} HTTP call")
+    check(all(r == results[0] and r.get("year") == "2001" for r in results), "All 5 callers got the same metadata")
+    check(main.OMDB_CACHE_STATS["coalesced"] - coalesced_before == 4, "4 lookups were counted as coalesced")
+
+    await asyncio.gather(main.fetch_omdb_metadata("Spaced Title"), main.fetch_omdb_metadata("  spaced title "))
+    check(sum(n for t, n in omdb_calls.items() if t.strip().casefold() == "spaced title") == 1,
+          "Case and whitespace variants share one fetch")
+
+async def test_recommend_fetches_each_title_once():
+    print("Testing OMDB fetches within one /recommend...")
+    # Duplicate picks, plus a pick outside the 20 prefetched candidates
+    install_fake_ai(main, fake_matches(30), {"movie_ids": ["m3", "m3", "m5", "m25"], "reasoning": {}})
+    omdb_calls.clear()
+    response = await main.recommend_movies(main.RecommendationRequest(query="heists"), stream=False)
+    movies = response["movies"]
+    check([m["id"] for m in movies] == ["m3", "m5", "m25"], "Duplicate picks collapse to one movie each")
+    check(all(m["year"] == "2001" for m in movies), "Every pick is enriched")
+    check(max(omdb_calls.values()) == 1, f"No title was fetched twice ({sum(omdb_calls.values())} fetches)")
+    check(omdb_calls["Movie 25"] == 1 and len(omdb_calls) == 21, "20 candidate prefetches plus the outside pick")
+
+async def main_checks():
+    mock_omdb(main, slow_omdb)
+    try:
+        await test_concurrent_lookups()
+        await test_recommend_fetches_each_title_once()
+    finally:
+        await main.embed_batcher.stop()
+        await main.pinecone_batcher.stop()
+        await main.OMDB_CLIENT.aclose()
+        await asyncio.to_thread(main.close_omdb_cache_db)
+
+if __name__ == "__main__":
+    asyncio.run(main_checks())
+    report("OMDB coalescing")
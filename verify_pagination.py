@@ -1,5 +1,10 @@
 import sqlite3
 import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from app.database import secure_poster_url
 
 DB_PATH = "movies.db"
 
@@ -20,12 +25,7 @@ def simulate_get_movies(page, limit):
                 if 'vote_average' in m:
                     m['score'] = m['vote_average']
                 
-                if m['poster_path'] and str(m['poster_path']).lower() != 'nan':
-                    m['poster_url'] = f"https://image.tmdb.org/t/p/w500{m['poster_path']}"
-                else:
-                    m['poster_url'] = None
-                
-                results.append(m)
+                results.append(secure_poster_url(m))
 
             total = conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
             
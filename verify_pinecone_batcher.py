@@ -0,0 +1,46 @@
+import os
+import sys
+import asyncio
+import time
+
+sys.path.append(os.getcwd())
+
+from app.pinecone_batcher import PineconeBatcher
+from verify_common import check, report
+
+# Fake Pinecone index: no network, every call recorded
+class FakeIndex:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def query(self, vector, top_k, include_metadata=True):
+        self.calls += 1
+        time.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("pinecone down")
+        return {"matches": [{"id": str(vector[0]), "score": 1.0}][:top_k]}
+
+async def test_pinecone_batcher():
+    print("Testing PineconeBatcher...")
+    index = FakeIndex()
+    batcher = PineconeBatcher(index, max_batch=16, max_wait_ms=20)
+
+    results = await asyncio.gather(*(batcher.submit([1.0], 5, key="same") for _ in range(5)))
+    check(index.calls == 1, f"5 callers with the same key shared {index.calls} query")
+    check(all(r is results[0] for r in results), "They all received the same result")
+
+    index.calls = 0
+    results = await asyncio.gather(*(batcher.submit([float(i)], 5, key=i) for i in range(3)))
+    check(index.calls == 3, f"Distinct keys ran separate queries ({index.calls})")
+    check([r["matches"][0]["id"] for r in results] == ["0.0", "1.0", "2.0"], "Each caller got its own result")
+    await batcher.stop()
+
+    failing = PineconeBatcher(FakeIndex(fail=True), max_batch=16, max_wait_ms=20)
+    results = await asyncio.gather(*(failing.submit([1.0], 5, key="same") for _ in range(3)), return_exceptions=True)
+    check(all(isinstance(r, RuntimeError) for r in results), "A failed query fans its error out to every caller")
+    await failing.stop()
+
+if __name__ == "__main__":
+    asyncio.run(test_pinecone_batcher())
+    report("Pinecone batcher")
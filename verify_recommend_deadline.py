@@ -0,0 +1,67 @@
+import os
+import sys
+import asyncio
+import time
+from collections import Counter
+
+sys.path.append(os.getcwd())
+
+import httpx
+from verify_common import check, report, import_root_service, mock_omdb, fake_matches, install_fake_ai
+
+main = import_root_service()
+
+SLOW_TITLE = "Movie 3"
+SLOW_SECONDS = 1.0
+omdb_calls = Counter()
+in_flight = 0
+max_in_flight = 0
+
+async def omdb(request: httpx.Request) -> httpx.Response:
+    global in_flight, max_in_flight
+    title = request.url.params["t"]
+    omdb_calls[title] += 1
+    in_flight += 1
+    max_in_flight = max(max_in_flight, in_flight)
+    try:
+        await asyncio.sleep(SLOW_SECONDS if title == SLOW_TITLE else 0.05)
+    finally:
+        in_flight -= 1
+    return httpx.Response(200, json={"Response": "True", "Poster": f"https://posters/{title}.jpg", "Year": "1995", "imdbRating": "8.1"})
+
+async def test_deadline():
+    print("Testing the /recommend OMDB fan-out bound and deadline...")
+    main.OMDB_ENRICH_DEADLINE_SECONDS = 0.3
+    install_fake_ai(main, fake_matches(30), {"movie_ids": ["m1", "m3", "m5"], "reasoning": {}})
+    skips_before = main.OMDB_CACHE_STATS["deadline_skips"]
+
+    started = time.perf_counter()
+    response = await main.recommend_movies(main.RecommendationRequest(query="thrillers"), stream=False)
+    elapsed = time.perf_counter() - started
+    movies = {m["id"]: m for m in response["movies"]}
+
+    check(elapsed < SLOW_SECONDS, f"The response did not wait for the slow lookup ({elapsed:.2f}s)")
+    check(list(movies) == ["m1", "m3", "m5"], "Every pick is still returned")
+    check(movies["m3"]["year"] is None and movies["m3"]["poster_url"], "The late pick goes out without OMDB fields, keeping its catalog poster")
+    check(movies["m1"]["year"] == "1995" and movies["m5"]["year"] == "1995", "Picks that beat the deadline are enriched")
+    check(main.OMDB_CACHE_STATS["deadline_skips"] - skips_before == 1, "The skip is counted in deadline_skips")
+    check(max_in_flight <= 8, f"At most 8 OMDB requests were in flight ({max_in_flight} for 20 candidates)")
+
+    # The late fetch is not cancelled: it completes and warms the cache for the next request
+    await asyncio.sleep(SLOW_SECONDS)
+    late = await main.fetch_omdb_metadata(SLOW_TITLE)
+    check(late.get("year") == "1995" and omdb_calls[SLOW_TITLE] == 1, "The late fetch still completed and was cached")
+
+async def main_checks():
+    mock_omdb(main, omdb)
+    try:
+        await test_deadline()
+    finally:
+        await main.embed_batcher.stop()
+        await main.pinecone_batcher.stop()
+        await main.OMDB_CLIENT.aclose()
+        await asyncio.to_thread(main.close_omdb_cache_db)
+
+if __name__ == "__main__":
+    asyncio.run(main_checks())
+    report("recommend deadline")
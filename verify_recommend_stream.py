@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+
+sys.path.append(os.getcwd())
+
+import httpx
+import google.generativeai as genai
+from starlette.testclient import TestClient
+from verify_common import check, report, import_root_service, mock_omdb, fake_matches, install_fake_ai
+
+main = import_root_service()
+
+def omdb(request: httpx.Request) -> httpx.Response:
+    title = request.url.params["t"]
+    return httpx.Response(200, json={"Response": "True", "Poster": f"https://posters/{title}.jpg", "Year": "1988", "imdbRating": "7.9"})
+
+def failing_embed(model, content, task_type):
+    raise RuntimeError("embedding service down")
+
+def read_events(client, body):
+    response = client.post("/recommend", params={"stream": "true"}, json=body)
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    return response, events
+
+def test_event_sequence(client):
+    print("Testing /recommend?stream=true events...")
+    body = {"query": "eighties adventure", "selected_movie_ids": ["m0"]}
+    response, events = read_events(client, body)
+    phases = [e["phase"] for e in events]
+    check(response.status_code == 200, "Stream answers 200")
+    check(response.headers["content-type"].startswith("application/x-ndjson"), "Stream is NDJSON")
+    check(phases == ["candidates", "reasoning", "final"], f"Events arrive as candidates -> reasoning -> final ({phases})")
+
+    candidates, reasoning, final = events
+    candidate_ids = [m["id"] for m in candidates["movies"]]
+    check(len(candidate_ids) == 20 and "m0" not in candidate_ids, "20 catalog cards, without the liked movie")
+    check(all(m["title"] and m["poster_url"] for m in candidates["movies"]), "Cards carry title and poster before Gemini answers")
+
+    final_ids = [m["id"] for m in final["movies"]]
+    check(reasoning["movie_ids"] == ["m3", "m5"], f"Reasoning lists only resolved picks, deduplicated ({reasoning['movie_ids']})")
+    check(final_ids == reasoning["movie_ids"], "Final movies match the reasoning event")
+    check(final["movies"][0]["reasoning"] == "Because of m3" and final["movies"][0]["year"] == "1988",
+          "Final movies carry Gemini's reasoning and OMDB fields")
+
+    classic = client.post("/recommend", json=body).json()
+    check([m["id"] for m in classic["movies"]] == final_ids and "phase" not in classic,
+          "The non-streaming response is the final event's body")
+
+def test_error_event(client):
+    print("Testing a failing /recommend stream...")
+    working_embed = genai.embed_content
+    genai.embed_content = failing_embed
+    try:
+        _, events = read_events(client, {"query": "a query nobody asked before", "selected_movie_ids": []})
+    finally:
+        genai.embed_content = working_embed
+    check([e["phase"] for e in events] == ["error"], "An embedding failure ends the stream with one error event")
+    check("embedding service down" in events[0].get("error", ""), "The error event says what failed")
+
+if __name__ == "__main__":
+    # Gemini picks a duplicate and an id that is not among the matches
+    install_fake_ai(main, fake_matches(30), {"movie_ids": ["m3", "m3", "not-a-match", "m5"], "reasoning": {"m3": "Because of m3"}})
+    with TestClient(main.app) as client:
+        mock_omdb(main, omdb)
+        test_event_sequence(client)
+        test_error_event(client)
+    report("recommend stream")